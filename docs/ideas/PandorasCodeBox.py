@@ -1,35 +1,193 @@
 # possible extension for PandorasLock. this will allow code to be sanitized and then deconstructed prior to being sent to a model for processing. 
 # the deconstruction will be recorded and can be used to reconstruct the original code after the model has processed it.
 
+import io
+import re
+import random
+import tokenize
+import keyword
+
+# Python 3.12+ splits f-strings into FSTRING_START / FSTRING_MIDDLE / FSTRING_END tokens.
+FSTRING_START = getattr(tokenize, "FSTRING_START", None)
+FSTRING_END = getattr(tokenize, "FSTRING_END", None)
+
+
+class CodeSanitizer:
+    """
+    Code-aware, reversible sanitizer for Python source.
+
+    Runs ``tokenize`` once over the whole block and replaces string literals, comments
+    and the chosen identifiers with numbered placeholders. Placeholder ``n`` restores
+    ``originals[n]``, so reversing is a single regex pass with list lookups.
+    Identifiers map to the same placeholder everywhere they appear.
+
+    Placeholders must not already occur in the source, or desanitize would "restore"
+    text that was never replaced. If the source contains ``prefix + "_"``, the first
+    block sanitized switches to a numbered prefix it does not contain; once
+    placeholders have been issued the prefix is fixed, so a colliding block raises
+    ValueError instead.
+    """
+
+    def __init__(self, identifiers=(), strings=True, comments=True, prefix="PBX"):
+        self.identifiers = set(identifiers)
+        self.strings = strings
+        self.comments = comments
+        self.originals = []
+        self._identifier_index = {}
+        self._set_prefix(prefix)
+
+    def _set_prefix(self, prefix):
+        self.prefix = prefix
+        self._placeholder = re.compile(
+            rf'"{prefix}_S(\d+)"|# {prefix}_C(\d+)|\b{prefix}_I(\d+)\b'
+        )
+
+    def _check_prefix(self, code):
+        if f"{self.prefix}_" not in code:
+            return
+        if self.originals:
+            raise ValueError(
+                f"Code contains the placeholder prefix {self.prefix!r} already used by this sanitizer"
+            )
+        base = self.prefix
+        suffix = 1
+        while f"{base}{suffix}_" in code:
+            suffix += 1
+        self._set_prefix(f"{base}{suffix}")
+
+    def sanitize(self, code):
+        """
+        Sanitize a block of Python source.
+
+        Raises ValueError if it cannot be tokenized, or if it contains this sanitizer's
+        placeholder prefix after placeholders have already been issued.
+        """
+        self._check_prefix(code)
+        # Offsets must come from the same lines tokenize reads: readline splits only on
+        # "\n", while str.splitlines also splits on form feeds, U+2028 and friends.
+        lines = io.StringIO(code).readlines()
+        line_offsets = [0]
+        for line in lines:
+            line_offsets.append(line_offsets[-1] + len(line))
+        readline = iter(lines + [""]).__next__
+
+        def offset(position):
+            row, col = position
+            return line_offsets[row - 1] + col
+
+        replacements = []
+        fstring_depth = 0
+        fstring_start = None
+        try:
+            for token in tokenize.generate_tokens(readline):
+                if FSTRING_START is not None and token.type == FSTRING_START:
+                    if fstring_depth == 0:
+                        fstring_start = token.start
+                    fstring_depth += 1
+                elif FSTRING_END is not None and token.type == FSTRING_END:
+                    fstring_depth -= 1
+                    if fstring_depth == 0 and self.strings:
+                        replacements.append((offset(fstring_start), offset(token.end), "S", None))
+                elif fstring_depth:
+                    continue
+                elif token.type == tokenize.STRING and self.strings:
+                    replacements.append((offset(token.start), offset(token.end), "S", None))
+                elif token.type == tokenize.COMMENT and self.comments:
+                    replacements.append((offset(token.start), offset(token.end), "C", None))
+                elif (token.type == tokenize.NAME and token.string in self.identifiers
+                      and not keyword.iskeyword(token.string)):
+                    replacements.append((offset(token.start), offset(token.end), "I", token.string))
+        except (tokenize.TokenError, IndentationError, SyntaxError) as e:
+            raise ValueError(f"Could not tokenize code block: {e}") from e
+
+        parts = []
+        cursor = 0
+        for start, end, kind, name in replacements:
+            parts.append(code[cursor:start])
+            parts.append(self._make_placeholder(kind, code[start:end], name))
+            cursor = end
+        parts.append(code[cursor:])
+        return "".join(parts)
+
+    def _make_placeholder(self, kind, original, name):
+        if kind == "I":
+            index = self._identifier_index.get(name)
+            if index is None:
+                index = self._identifier_index[name] = len(self.originals)
+                self.originals.append(original)
+            return f"{self.prefix}_I{index}"
+
+        index = len(self.originals)
+        self.originals.append(original)
+        if kind == "S":
+            return f'"{self.prefix}_S{index}"'
+        return f"# {self.prefix}_C{index}"
+
+    def desanitize(self, code):
+        """Restore every placeholder produced by this sanitizer; unknown ones are left alone."""
+        def restore(match):
+            index = int(next(group for group in match.groups() if group is not None))
+            return self.originals[index] if index < len(self.originals) else match.group(0)
+
+        return self._placeholder.sub(restore, code)
+
+    def clear(self):
+        self.originals = []
+        self._identifier_index = {}
+
+
 class PandorasBox:
-    def __init__(self, sanitizer):
+    def __init__(self, sanitizer, seed=None):
         self.sanitizer = sanitizer
-        self.original_order_map = {}
+        self.rng = random.Random(seed)
+        # original_order[i] is the index the i-th shuffled line had before shuffling.
+        self.original_order = []
+        self.original_lines = []
+        self.sanitized_lines = []
 
     def process_code_block(self, code_block):
         """
         Public function to process a code block with sanitization and deconstruction.
         """
-        # Separate lines and shuffle them randomly
-        lines = code_block.split("\n")
-        random.shuffle(lines)
+        # Sanitize the whole block in one call, then shuffle the sanitized lines
+        sanitized_lines = self.sanitizer.sanitize(code_block).split("\n")
+        order = list(range(len(sanitized_lines)))
+        self.rng.shuffle(order)
 
-        # Apply PandorasLock and record original order
-        for i in range(len(lines)):
-            sanitized_line = self.sanitizer.sanitize(lines[i])
-            self.original_order_map[sanitized_line] = lines[i]
-            lines[i] = sanitized_line
+        # Record the original position of every shuffled line
+        self.original_order = order
+        self.original_lines = code_block.split("\n")
+        self.sanitized_lines = sanitized_lines
 
         # Join the shuffled and sanitized lines and return
-        return "\n".join(lines)
+        return "\n".join(sanitized_lines[i] for i in order)
 
     def revert_code_order(self, sanitized_block):
         """
-        Reverts the order of code lines to the original, using the original_order_map.
+        Reverts the order of code lines to the original, using the recorded positions,
+        then reverses the sanitization.
         """
         lines = sanitized_block.split("\n")
-        reverted_lines = [self.original_order_map.get(line, line) for line in lines]
-        return "\n".join(reverted_lines)
+        if len(lines) != len(self.original_order):
+            raise ValueError(
+                f"Expected {len(self.original_order)} lines to restore, got {len(lines)}"
+            )
+
+        restored = [None] * len(lines)
+        for position, original_index in enumerate(self.original_order):
+            restored[original_index] = lines[position]
+
+        reverse = getattr(self.sanitizer, "desanitize", None) or getattr(self.sanitizer, "reverse_sanitization", None)
+        if reverse is not None:
+            return reverse("\n".join(restored))
+
+        # Sanitizer cannot reverse itself: restore lines the model left untouched by index
+        if len(self.original_lines) == len(restored):
+            restored = [
+                self.original_lines[i] if line == self.sanitized_lines[i] else line
+                for i, line in enumerate(restored)
+            ]
+        return "\n".join(restored)
 
 # # Example usage: PandorasLock
 # # Create an instance of PandorasLock
@@ -45,3 +203,14 @@ class PandorasBox:
 # original_text = lock.reverse_sanitization(sanitized_text)
 # print(original_text)
 # # Output: "My email is john.doe@example.com and my phone number is 123-456-7890."
+
+# # Example usage: CodeSanitizer with PandorasBox
+# box = PandorasBox(CodeSanitizer(identifiers={"db_password"}), seed=42)
+# code = 'db_password = "hunter2"  # prod creds\nconnect(host="10.0.0.5", password=db_password)'
+# shuffled = box.process_code_block(code)
+# print(shuffled)
+# # Output (line order depends on the seed):
+# # connect(host="PBX_S3", password=PBX_I0)
+# # PBX_I0 = "PBX_S1"  # PBX_C2
+# print(box.revert_code_order(shuffled) == code)
+# # Output: True
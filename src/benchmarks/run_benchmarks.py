@@ -0,0 +1,541 @@
+"""
+End-to-end benchmarks for the PandorasLock hot paths.
+
+Runs entirely offline against the stand-ins in ``stand_ins.py`` and writes the results
+as JSON so runs can be compared. Usage::
+
+    python -m src.benchmarks.run_benchmarks --output bench.json
+    python -m src.benchmarks.run_benchmarks --output new.json --compare bench.json
+
+A benchmark whose dependencies are not installed is recorded as skipped instead of
+failing the whole run.
+"""
+import argparse
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import typing
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.metrics import maybe_profile_run, metrics, percentiles
+
+from .stand_ins import (
+    FakeOllamaServer,
+    InMemoryGraph,
+    InMemoryPgConnection,
+    RegexSanitizer,
+    StubEmbedder,
+    StubTokenizer,
+    StubTransformerModel,
+    make_stand_in,
+    stand_in_modules,
+)
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def load_module_from_path(name: str, path: Path):
+    """Import a module from a file path (needed for files such as ``repo-db-importer.py``)."""
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StageTimer:
+    """Accumulate wall time and call counts for wrapped callables, keyed by stage name."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+                self.calls[stage] = self.calls.get(stage, 0) + 1
+        return timed
+
+
+def generate_python_repo(path: Path, files: int, functions_per_file: int, classes_per_file: int) -> None:
+    """Write a synthetic Python repository to ``path``."""
+    for f in range(files):
+        package = path / f"pkg{f % 10}"
+        package.mkdir(parents=True, exist_ok=True)
+        parts = ['"""Synthetic benchmark module."""', "import os", ""]
+        for c in range(classes_per_file):
+            parts.append(f"class Widget{f}_{c}:")
+            parts.append(f"    def method_{c}(self, value):")
+            parts.append(f"        return value * {c + 1}")
+            parts.append("")
+        for fn in range(functions_per_file):
+            parts.append(f"def compute_{f}_{fn}(items):")
+            parts.append("    total = 0")
+            parts.append("    for item in items:")
+            parts.append(f"        total += item ** {fn % 3 + 1}")
+            parts.append("    return os.path.join(str(total), 'x')")
+            parts.append("")
+        (package / f"module_{f}.py").write_text("\n".join(parts))
+
+
+def bench_repo_importer(args) -> Dict[str, Any]:
+    """
+    Import a repository through RepoDBImporter against in-memory Postgres and Neo4j.
+
+    Database clients the importer imports but that are not installed are replaced by
+    the stand-ins for the duration of the import. The importer's own
+    ``generate_embedding`` always runs: on a stub tokenizer and model, on the real
+    model, or through an ``EmbeddingClient`` backend talking to an in-process
+    embedding service.
+    """
+    with stand_in_modules("py2neo", "psycopg2", "psycopg2.extras") as stubbed:
+        module = load_module_from_path("repo_db_importer", PROJECT_ROOT / "src" / "rag" / "repo-db-importer.py")
+
+    importer = module.RepoDBImporter.__new__(module.RepoDBImporter)
+    importer.neo4j_graph = InMemoryGraph()
+    importer.pg_conn = InMemoryPgConnection()
+    importer.pg_cursor = importer.pg_conn.cursor()
+    importer.embedding_backend = None
+
+    server = None
+    if args.embedding == "model":
+        importer._load_local_model(local_files_only=True)
+    elif args.embedding == "service":
+        from src.rag.embedding_service import EmbeddingClient, EmbeddingServer
+
+        server = EmbeddingServer(StubEmbedder().embed_batch, port=0).start()
+        importer.embedding_backend = EmbeddingClient(server.url)
+    else:
+        importer.torch = make_stand_in("torch")
+        importer.tokenizer = StubTokenizer()
+        importer.model = StubTransformerModel()
+
+    timer = StageTimer()
+    importer.generate_embedding = timer.wrap("embed", importer.generate_embedding)
+    importer.pg_cursor.execute = timer.wrap("pg_write", importer.pg_cursor.execute)
+    importer.pg_conn.commit = timer.wrap("pg_write", importer.pg_conn.commit)
+    importer.neo4j_graph.create = timer.wrap("graph_write", importer.neo4j_graph.create)
+    importer.neo4j_graph.push = timer.wrap("graph_write", importer.neo4j_graph.push)
+
+    workdir = Path(tempfile.mkdtemp(prefix="pandoras_bench_repo_"))
+    try:
+        if args.repo_path:
+            repo_path = Path(args.repo_path)
+        else:
+            repo_path = workdir
+            generate_python_repo(repo_path, args.importer_files, args.functions_per_file, args.classes_per_file)
+        file_count = sum(1 for _ in repo_path.rglob("*.py"))
+
+        start = time.perf_counter()
+        importer.import_repo(str(repo_path), "benchmark_repo")
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server is not None:
+            server.stop()
+
+    graph = importer.neo4j_graph
+    entities = graph.count_labels("Function", "Class")
+    stages = dict(timer.seconds)
+    stages["parse_other"] = max(0.0, elapsed - sum(stages.values()))
+
+    return {
+        "embedding": args.embedding,
+        "stand_in_modules": stubbed,
+        "files": file_count,
+        "entities": entities,
+        "embeddings_stored": len(importer.pg_conn.rows),
+        "elapsed": elapsed,
+        "files_per_sec": file_count / elapsed if elapsed else None,
+        "entities_per_sec": entities / elapsed if elapsed else None,
+        "stage_seconds": stages,
+        "stage_calls": dict(timer.calls),
+    }
+
+
+def bench_ollama(args) -> Dict[str, Any]:
+    """Drive OllamaManager against a local fake Ollama server."""
+    from src.utils.ollama_manager import OllamaManager
+
+    with FakeOllamaServer(tokens_per_response=args.ollama_tokens, token_delay=args.ollama_token_delay) as server:
+        manager = OllamaManager(server.host, server.port, server.model)
+        latencies = []
+        eval_tokens = 0
+        prompt = "Classify the entities in: server 10.0.0.12 owned by ops@example.com"
+
+        start = time.perf_counter()
+        for _ in range(args.ollama_requests):
+            request_start = time.perf_counter()
+            _, chunks = manager.generate_response_with_details(prompt)
+            latencies.append(time.perf_counter() - request_start)
+            if chunks:
+                eval_tokens += chunks[-1].get("eval_count", 0)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": args.ollama_requests,
+        "tokens_per_response": args.ollama_tokens,
+        "elapsed": elapsed,
+        "requests_per_sec": args.ollama_requests / elapsed if elapsed else None,
+        "tokens_per_sec": eval_tokens / elapsed if elapsed else None,
+        "latency": percentiles(latencies),
+    }
+
+
+def bench_chat_session(args) -> Dict[str, Any]:
+    """Compare per-turn prompt evaluation for context reuse against resending history."""
+    from src.utils.chat_session import ChatSession
+    from src.utils.ollama_manager import OllamaManager
+
+    results = {}
+    with FakeOllamaServer(tokens_per_response=args.ollama_tokens,
+                          prompt_token_delay=args.chat_prompt_token_delay) as server:
+        manager = OllamaManager(server.host, server.port, server.model)
+        for mode, use_context in (("context", True), ("history", False)):
+            session = ChatSession(manager, system_prompt="You are a careful assistant.",
+                                  max_history_tokens=1_000_000, use_context=use_context)
+            for turn in range(args.chat_turns):
+                session.send(f"turn {turn}: summarise the sanitized log excerpt for host [IP_{turn}]")
+            prompt_eval = [t["prompt_eval_duration"] for t in session.turns]
+            results[mode] = {
+                "turns": len(session.turns),
+                "prompt_eval_tokens": [t["prompt_eval_count"] for t in session.turns],
+                "prompt_eval_seconds_first": prompt_eval[0] if prompt_eval else None,
+                "prompt_eval_seconds_last": prompt_eval[-1] if prompt_eval else None,
+                "wall_time": percentiles([t["wall_time"] for t in session.turns]),
+            }
+    return results
+
+
+def bench_embedding_service(args) -> Dict[str, Any]:
+    """Concurrent clients against the shared embedding service: client latency and server batching."""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.rag.embedding_service import EmbeddingClient, EmbeddingServer
+
+    if args.embedding == "model":
+        from src.rag.embedding_service import TransformerEmbedder
+        embed_batch = TransformerEmbedder()
+    else:
+        stub = StubEmbedder()
+
+        def embed_batch(texts):
+            # Fixed per-call cost stands in for model dispatch overhead, which batching amortises.
+            time.sleep(args.embed_call_overhead)
+            return stub.embed_batch(texts)
+
+    texts = [f"def compute_{i}(items):\n    return sum(items) * {i}" for i in range(args.embedding_requests)]
+    results = {}
+    for max_batch_size in (1, args.embedding_max_batch_size):
+        with EmbeddingServer(embed_batch, port=0, max_batch_size=max_batch_size,
+                             max_wait=args.embedding_max_wait_ms / 1000) as server:
+            client = EmbeddingClient(server.url)
+
+            def timed_embed(text):
+                start = time.perf_counter()
+                client.embed_one(text)
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.embedding_clients) as pool:
+                latencies = list(pool.map(timed_embed, texts))
+            elapsed = time.perf_counter() - start
+            server_stats = client.stats()
+
+        results[f"max_batch_{max_batch_size}"] = {
+            "clients": args.embedding_clients,
+            "requests": len(texts),
+            "elapsed": elapsed,
+            "requests_per_sec": len(texts) / elapsed if elapsed else None,
+            "latency": percentiles(latencies),
+            "mean_batch_size": server_stats["mean_batch_size"],
+            "server_batch_seconds": server_stats["batch_seconds"],
+        }
+    return results
+
+
+def _label_candidates(prompt: str) -> str:
+    """Fake LLM classifier: accept every candidate except names."""
+    items = re.findall(r"^(\d+)\. \(looks like (\w+)\)", prompt, re.MULTILINE)
+    return json.dumps([{"id": int(i), "label": "NONE" if hint == "PERSON" else hint} for i, hint in items])
+
+
+def bench_entity_cascade(args) -> Dict[str, Any]:
+    """Measure how much text the regex prefilter lets through to the LLM, cold and with a warm cache."""
+    from src.utils.entity_cascade import EntityCascade
+    from src.utils.ollama_manager import OllamaManager
+
+    rng = random.Random(args.seed)
+    lines = _synthetic_text(args.cascade_lines, rng).split("\n")
+    for i in range(0, len(lines), 10):
+        lines[i] += f" password={rng.choice(['hunter2', 'letmein', 'S3cr3t!x'])} account {rng.randint(10**7, 10**8)}"
+    text = "\n".join(lines)
+
+    results = {"chars": len(text)}
+    with FakeOllamaServer(responder=_label_candidates) as server:
+        cascade = EntityCascade(OllamaManager(server.host, server.port, server.model),
+                                batch_size=args.cascade_batch_size)
+        for run in ("cold", "warm"):
+            start = time.perf_counter()
+            entities, stats = cascade.classify(text)
+            elapsed = time.perf_counter() - start
+            stats.update({
+                "entities": len(entities),
+                "elapsed": elapsed,
+                "mb_per_sec": len(text) / 1e6 / elapsed if elapsed else None,
+            })
+            results[run] = stats
+    return results
+
+
+def _synthetic_text(lines: int, rng: random.Random) -> str:
+    out = []
+    for i in range(lines):
+        ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+        out.append(f"line {i}: host {ip} contacted by user{rng.randint(1, 50)}@example.com status ok")
+    return "\n".join(out)
+
+
+def bench_sanitizer(args) -> Dict[str, Any]:
+    """Measure regex sanitize/de-sanitize throughput and PandorasBox code-block handling."""
+    rng = random.Random(args.seed)
+    text = _synthetic_text(args.sanitize_lines, rng)
+    size_mb = len(text.encode("utf-8")) / 1e6
+
+    sanitizer = RegexSanitizer()
+    start = time.perf_counter()
+    sanitized = sanitizer.sanitize(text)
+    sanitize_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored = sanitizer.desanitize(sanitized)
+    desanitize_elapsed = time.perf_counter() - start
+
+    results = {
+        "input_mb": size_mb,
+        "sanitize_mb_per_sec": size_mb / sanitize_elapsed if sanitize_elapsed else None,
+        "desanitize_mb_per_sec": size_mb / desanitize_elapsed if desanitize_elapsed else None,
+        "distinct_entities": len(sanitizer.forward),
+        "round_trip_ok": restored == text,
+    }
+
+    codebox = load_module_from_path("pandoras_code_box", PROJECT_ROOT / "docs" / "ideas" / "PandorasCodeBox.py")
+    box = codebox.PandorasBox(RegexSanitizer())
+    start = time.perf_counter()
+    processed = box.process_code_block(text)
+    process_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    box.revert_code_order(processed)
+    revert_elapsed = time.perf_counter() - start
+    results["codebox_lines_per_sec"] = args.sanitize_lines / process_elapsed if process_elapsed else None
+    results["codebox_revert_lines_per_sec"] = args.sanitize_lines / revert_elapsed if revert_elapsed else None
+
+    results["code_sanitizer"] = _bench_code_sanitizer(codebox, args)
+    return results
+
+
+def _bench_code_sanitizer(codebox, args) -> Dict[str, Any]:
+    """Single-pass tokenize sanitizer over large Python sources, plus the PandorasBox round trip."""
+    if args.code_sources:
+        paths = [Path(p) for p in args.code_sources]
+    else:
+        paths = [Path(m.__file__) for m in (argparse, inspect, typing)]
+    source = "".join(path.read_text() for path in paths)
+    size_mb = len(source.encode("utf-8")) / 1e6
+    line_count = source.count("\n")
+
+    sanitizer = codebox.CodeSanitizer(identifiers={"self", "cls"})
+    start = time.perf_counter()
+    sanitized = sanitizer.sanitize(source)
+    sanitize_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored = sanitizer.desanitize(sanitized)
+    desanitize_elapsed = time.perf_counter() - start
+
+    box = codebox.PandorasBox(codebox.CodeSanitizer(identifiers={"self", "cls"}), seed=args.seed)
+    start = time.perf_counter()
+    shuffled = box.process_code_block(source)
+    reverted = box.revert_code_order(shuffled)
+    round_trip_elapsed = time.perf_counter() - start
+
+    return {
+        "sources": [str(path) for path in paths],
+        "input_mb": size_mb,
+        "lines": line_count,
+        "placeholders": len(sanitizer.originals),
+        "sanitize_mb_per_sec": size_mb / sanitize_elapsed if sanitize_elapsed else None,
+        "sanitize_lines_per_sec": line_count / sanitize_elapsed if sanitize_elapsed else None,
+        "desanitize_mb_per_sec": size_mb / desanitize_elapsed if desanitize_elapsed else None,
+        "box_round_trip_lines_per_sec": line_count / round_trip_elapsed if round_trip_elapsed else None,
+        "round_trip_ok": restored == source and reverted == source,
+    }
+
+
+def bench_git(args) -> Dict[str, Any]:
+    """Time GitHubOperationsManager file reads and commits against a throwaway local repository."""
+    from git import Repo
+
+    github_ops = load_module_from_path("github_ops_manager", PROJECT_ROOT / "src" / "rag" / "github_ops_manager.py")
+
+    workdir = tempfile.mkdtemp(prefix="pandoras_bench_git_")
+    try:
+        repo = Repo.init(workdir)
+        with repo.config_writer() as writer:
+            writer.set_value("user", "name", "bench")
+            writer.set_value("user", "email", "bench@example.com")
+
+        # Per-operation INFO logs would dominate the timings.
+        github_ops.logger.setLevel(logging.WARNING)
+        manager = github_ops.GitHubOperationsManager()
+        manager.local_repo = repo
+        manager.update_file_content("README.md", "benchmark\n", "initial commit")
+
+        read_latencies = []
+        commit_latencies = []
+        for i in range(args.git_operations):
+            start = time.perf_counter()
+            manager.get_file_content("README.md")
+            read_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            manager.update_file_content("README.md", f"benchmark {i}\n", f"benchmark commit {i}")
+            commit_latencies.append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "operations": args.git_operations,
+        "read_latency": percentiles(read_latencies),
+        "commit_latency": percentiles(commit_latencies),
+    }
+
+
+BENCHMARKS = {
+    "repo_importer": bench_repo_importer,
+    "ollama": bench_ollama,
+    "chat_session": bench_chat_session,
+    "sanitizer": bench_sanitizer,
+    "entity_cascade": bench_entity_cascade,
+    "embedding_service": bench_embedding_service,
+    "git": bench_git,
+}
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "benchmarks": {},
+    }
+    if args.metrics:
+        metrics.reset()
+        metrics.enable()
+
+    with maybe_profile_run(args.profile_dir):
+        for name in args.only or BENCHMARKS:
+            logger.info(f"Running benchmark: {name}")
+            try:
+                results["benchmarks"][name] = BENCHMARKS[name](args)
+            except ImportError as e:
+                logger.warning(f"Skipping {name}: {e}")
+                results["benchmarks"][name] = {"skipped": f"missing dependency: {e}"}
+
+    if args.metrics:
+        results["metrics"] = metrics.snapshot()
+    return results
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare_results(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Return ``{metric: {previous, current, ratio}}`` for every numeric metric present in both runs."""
+    old: Dict[str, float] = {}
+    new: Dict[str, float] = {}
+    _flatten("", previous.get("benchmarks", {}), old)
+    _flatten("", current.get("benchmarks", {}), new)
+    return {
+        key: {"previous": old[key], "current": new[key], "ratio": new[key] / old[key] if old[key] else None}
+        for key in sorted(old.keys() & new.keys())
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run offline PandorasLock benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Path of the JSON results file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record instrumentation spans/counters and include a snapshot in the results")
+    parser.add_argument("--profile-dir", help="Write cProfile and tracemalloc output for the run to this directory")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repo-path", help="Import this repository instead of a generated one")
+    parser.add_argument("--importer-files", type=int, default=50)
+    parser.add_argument("--functions-per-file", type=int, default=8)
+    parser.add_argument("--classes-per-file", type=int, default=2)
+    parser.add_argument("--embedding", choices=["stub", "model", "service"], default="stub",
+                        help="'model' loads all-MiniLM-L6-v2 from the local Hugging Face cache; 'service' "
+                             "routes importer embeddings through an in-process embedding service")
+    parser.add_argument("--ollama-requests", type=int, default=200)
+    parser.add_argument("--ollama-tokens", type=int, default=32)
+    parser.add_argument("--ollama-token-delay", type=float, default=0.0)
+    parser.add_argument("--chat-turns", type=int, default=20)
+    parser.add_argument("--chat-prompt-token-delay", type=float, default=0.0002,
+                        help="Simulated prompt evaluation seconds per token on the fake server")
+    parser.add_argument("--sanitize-lines", type=int, default=20000)
+    parser.add_argument("--embedding-clients", type=int, default=16)
+    parser.add_argument("--embedding-requests", type=int, default=512)
+    parser.add_argument("--embedding-max-batch-size", type=int, default=32)
+    parser.add_argument("--embedding-max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--embed-call-overhead", type=float, default=0.01,
+                        help="Simulated fixed seconds per stub model call in the embedding service benchmark")
+    parser.add_argument("--cascade-lines", type=int, default=5000)
+    parser.add_argument("--cascade-batch-size", type=int, default=16)
+    parser.add_argument("--code-sources", nargs="+",
+                        help="Python files for the code sanitizer benchmark (default: large stdlib modules)")
+    parser.add_argument("--git-operations", type=int, default=50)
+    return parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_parser().parse_args(argv)
+
+    results = run_benchmarks(args)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            results["comparison"] = compare_results(json.load(f), results)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    logger.info(f"Benchmark results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+In-process stand-ins for the external services used by PandorasLock.
+
+These let the benchmarks exercise the real client code (OllamaManager, RepoDBImporter,
+GitHubOperationsManager) offline on a CPU-only machine, without Docker, PostgreSQL,
+Neo4j or a GPU. ``stand_in_modules`` goes one level lower for modules that import
+py2neo, psycopg2, transformers or torch at import time and are not installed.
+"""
+import contextlib
+import importlib
+import json
+import re
+import sys
+import threading
+import time
+import types
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.model}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path == "/api/generate":
+            self._stream_generate(self._read_json())
+        elif self.path == "/api/chat":
+            self._stream_chat(self._read_json())
+        elif self.path == "/api/pull":
+            self._send_json({"status": "success"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _stream_generate(self, request):
+        prompt_tokens = len(request.get("prompt", "").split()) + len(request.get("system", "").split())
+        context = request.get("context") or []
+
+        # A supplied context is treated as a KV-cache hit: only the new prompt is evaluated.
+        if self.server.responder is not None:
+            text = self.server.responder(request.get("prompt", ""))
+            final = self._stream_tokens(prompt_tokens, lambda i: {"response": text if i == 0 else ""})
+        else:
+            final = self._stream_tokens(prompt_tokens, lambda i: {"response": f"tok{i} "})
+        final["response"] = ""
+        if self.server.return_context:
+            final["context"] = list(context) + list(range(prompt_tokens + self.server.tokens_per_response))
+        self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+
+    def _stream_chat(self, request):
+        # /api/chat re-evaluates every message it is sent.
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in request.get("messages", []))
+        final = self._stream_tokens(prompt_tokens, lambda i: {"message": {"role": "assistant", "content": f"tok{i} "}})
+        final["message"] = {"role": "assistant", "content": ""}
+        self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+
+    def _stream_tokens(self, prompt_tokens, make_chunk):
+        """Simulate prompt evaluation, stream the response chunks and return the final chunk."""
+        server = self.server
+        prompt_eval_duration = prompt_tokens * server.prompt_token_delay
+        time.sleep(prompt_eval_duration)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        start = time.monotonic()
+        for i in range(server.tokens_per_response):
+            if server.token_delay:
+                time.sleep(server.token_delay)
+            chunk = dict(make_chunk(i), model=server.model, done=False)
+            self.wfile.write(json.dumps(chunk).encode("utf-8") + b"\n")
+        eval_duration = time.monotonic() - start
+
+        server.request_count += 1
+        return {
+            "model": server.model,
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval_duration * 1e9),
+            "eval_count": server.tokens_per_response,
+            "eval_duration": int(eval_duration * 1e9),
+        }
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Minimal Ollama-compatible HTTP server running on a background thread.
+
+    Implements ``/api/tags``, ``/api/pull`` and streaming ``/api/generate`` and
+    ``/api/chat``, with final chunks carrying ``context`` (generate only) and the eval
+    counters/durations Ollama reports.
+
+    Args:
+    model (str): Model name reported by ``/api/tags``
+    tokens_per_response (int): Number of streamed response chunks per request
+    token_delay (float): Seconds to sleep before each streamed chunk
+    prompt_token_delay (float): Seconds of simulated prompt evaluation per input token
+    return_context (bool): Include ``context`` in the final ``/api/generate`` chunk
+    responder (Callable[[str], str]): Optional function producing the ``/api/generate`` reply
+        for a prompt; by default the reply is ``tokens_per_response`` filler tokens
+    """
+
+    daemon_threads = True
+
+    def __init__(self, model: str = "bench-model", tokens_per_response: int = 32,
+                 token_delay: float = 0.0, prompt_token_delay: float = 0.0,
+                 return_context: bool = True, responder: Optional[Callable[[str], str]] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _FakeOllamaHandler)
+        self.model = model
+        self.tokens_per_response = tokens_per_response
+        self.token_delay = token_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.return_context = return_context
+        self.responder = responder
+        self.request_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class InMemoryGraph:
+    """Stand-in for ``py2neo.Graph`` that records created nodes and relationships."""
+
+    def __init__(self, *args, **kwargs):
+        self.nodes: List[Any] = []
+        self.relationships: List[Any] = []
+        self.push_count = 0
+        self._seen = set()
+
+    def create(self, subgraph):
+        for node in getattr(subgraph, "nodes", (subgraph,)):
+            if id(node) not in self._seen:
+                self._seen.add(id(node))
+                self.nodes.append(node)
+        self.relationships.extend(getattr(subgraph, "relationships", ()))
+
+    def push(self, subgraph):
+        self.push_count += 1
+
+    def count_labels(self, *labels: str) -> int:
+        return sum(1 for node in self.nodes if any(node.has_label(label) for label in labels))
+
+
+class InMemoryPgCursor:
+    """Stand-in for a psycopg2 cursor; every INSERT ... RETURNING id gets a fresh id."""
+
+    def __init__(self, connection: "InMemoryPgConnection"):
+        self.connection = connection
+        self._result: Optional[Tuple[Any, ...]] = None
+
+    def execute(self, query, params=None):
+        self.connection.rows.append(params)
+        self._result = (len(self.connection.rows),)
+
+    def fetchone(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class InMemoryPgConnection:
+    """Stand-in for a psycopg2 connection that keeps inserted rows in a list."""
+
+    def __init__(self):
+        self.rows: List[Any] = []
+        self.commit_count = 0
+
+    def cursor(self):
+        return InMemoryPgCursor(self)
+
+    def commit(self):
+        self.commit_count += 1
+
+    def close(self):
+        pass
+
+
+class StubEmbedder:
+    """
+    Deterministic, model-free embedder behind the benchmark embedding services.
+
+    Produces a float32 vector seeded from the text's CRC32 so repeated runs store
+    identical vectors.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def __call__(self, text):
+        import numpy as np
+
+        seed = zlib.crc32((text or "").encode("utf-8"))
+        return np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+
+    def embed_batch(self, texts):
+        """Batch form for the embedding service's MicroBatcher."""
+        import numpy as np
+
+        return np.stack([self(text) for text in texts]) if texts else np.zeros((0, self.dimension), np.float32)
+
+
+STUB_VOCAB_SIZE = 4096
+
+
+class StubTensor:
+    """The part of the ``torch.Tensor`` API that RepoDBImporter uses, backed by a numpy array."""
+
+    def __init__(self, array):
+        self.array = array
+
+    def mean(self, dim):
+        return StubTensor(self.array.mean(axis=dim))
+
+    def numpy(self):
+        return self.array
+
+
+class StubTokenizer:
+    """
+    Whitespace tokenizer with the ``AutoTokenizer`` call signature.
+
+    Token ids are CRC32 hashes of the words modulo ``STUB_VOCAB_SIZE``, returned as
+    (1, tokens) arrays.
+    """
+
+    @classmethod
+    def from_pretrained(cls, model_name, **kwargs):
+        return cls()
+
+    def __call__(self, text, return_tensors=None, truncation=False, max_length=None, padding=False):
+        import numpy as np
+
+        ids = [zlib.crc32(word.encode("utf-8")) % STUB_VOCAB_SIZE for word in (text or "").split()] or [0]
+        if truncation and max_length:
+            ids = ids[:max_length]
+        input_ids = np.array([ids])
+        return {"input_ids": input_ids, "attention_mask": np.ones_like(input_ids)}
+
+
+class StubTransformerModel:
+    """
+    Embedding-table lookup with the ``AutoModel`` call signature.
+
+    ``last_hidden_state`` holds one fixed random row per token id, so RepoDBImporter's
+    own mean pooling runs on realistically shaped (1, tokens, dimension) output.
+    """
+
+    def __init__(self, dimension: int = 384, seed: int = 0):
+        import numpy as np
+
+        self.table = np.random.default_rng(seed).standard_normal((STUB_VOCAB_SIZE, dimension)).astype(np.float32)
+
+    @classmethod
+    def from_pretrained(cls, model_name, **kwargs):
+        return cls()
+
+    def __call__(self, input_ids, attention_mask=None, **kwargs):
+        return types.SimpleNamespace(last_hidden_state=StubTensor(self.table[input_ids]))
+
+
+class StubNode(dict):
+    """Stand-in for ``py2neo.Node``: a property dict with labels."""
+
+    def __init__(self, *labels, **properties):
+        super().__init__(properties)
+        self.labels = set(labels)
+
+    def has_label(self, label) -> bool:
+        return label in self.labels
+
+    @property
+    def nodes(self):
+        return (self,)
+
+    relationships = ()
+
+
+class StubRelationship:
+    """Stand-in for ``py2neo.Relationship``."""
+
+    def __init__(self, start_node, type, end_node, **properties):
+        self.start_node = start_node
+        self.type = type
+        self.end_node = end_node
+        self.properties = properties
+
+    @property
+    def nodes(self):
+        return (self.start_node, self.end_node)
+
+    @property
+    def relationships(self):
+        return (self,)
+
+
+def _execute_values(cursor, query, argslist, **kwargs):
+    for args in argslist:
+        cursor.execute(query, args)
+
+
+def _make_module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def make_stand_in(name: str) -> types.ModuleType:
+    """Build a fresh stand-in module for ``name`` without installing it in ``sys.modules``."""
+    return _STAND_IN_MODULES[name]()
+
+
+_STAND_IN_MODULES = {
+    "py2neo": lambda: _make_module("py2neo", Graph=InMemoryGraph, Node=StubNode, Relationship=StubRelationship),
+    "psycopg2": lambda: _make_module("psycopg2", connect=lambda *args, **kwargs: InMemoryPgConnection()),
+    "psycopg2.extras": lambda: _make_module("psycopg2.extras", execute_values=_execute_values),
+    "transformers": lambda: _make_module("transformers", AutoTokenizer=StubTokenizer, AutoModel=StubTransformerModel),
+    "torch": lambda: _make_module("torch", no_grad=contextlib.nullcontext),
+}
+
+
+@contextlib.contextmanager
+def stand_in_modules(*names: str):
+    """
+    Temporarily install stand-ins for whichever of ``names`` cannot be imported.
+
+    Installed modules are used as they are; only missing ones are replaced, and the
+    stand-ins are removed from ``sys.modules`` again on exit. Yields the list of
+    replaced module names. Supported names are py2neo, psycopg2, psycopg2.extras,
+    transformers and torch.
+    """
+    stubbed: List[str] = []
+    try:
+        for name in names:
+            try:
+                importlib.import_module(name)
+                continue
+            except ImportError:
+                pass
+            module = sys.modules[name] = make_stand_in(name)
+            parent, _, child = name.rpartition(".")
+            if parent in stubbed:
+                setattr(sys.modules[parent], child, module)
+            stubbed.append(name)
+        yield stubbed
+    finally:
+        for name in stubbed:
+            sys.modules.pop(name, None)
+
+
+class RegexSanitizer:
+    """
+    Reversible regex sanitizer using the default patterns from the README configuration.
+
+    Each distinct match is replaced by a stable ``[LABEL_n]`` placeholder and recorded so
+    ``desanitize`` can restore the original text.
+    """
+
+    DEFAULT_PATTERNS = {
+        "IP": r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b",
+        "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
+    }
+
+    def __init__(self, patterns: Optional[Dict[str, str]] = None):
+        patterns = patterns or self.DEFAULT_PATTERNS
+        self._pattern = re.compile("|".join(f"(?P<{label}>{regex})" for label, regex in patterns.items()))
+        self.forward: Dict[str, str] = {}
+        self.reverse: Dict[str, str] = {}
+        self._placeholder = re.compile(r"\[(?:%s)_\d+\]" % "|".join(patterns))
+
+    def _replace(self, match):
+        original = match.group(0)
+        placeholder = self.forward.get(original)
+        if placeholder is None:
+            placeholder = f"[{match.lastgroup}_{len(self.forward)}]"
+            self.forward[original] = placeholder
+            self.reverse[placeholder] = original
+        return placeholder
+
+    def sanitize(self, text: str) -> str:
+        return self._pattern.sub(self._replace, text)
+
+    def desanitize(self, text: str) -> str:
+        return self._placeholder.sub(lambda m: self.reverse.get(m.group(0), m.group(0)), text)
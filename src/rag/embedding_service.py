@@ -0,0 +1,355 @@
+"""
+Shared local embedding service.
+
+One long-lived process loads the embedding model once and serves every importer or
+retrieval client over localhost HTTP. Concurrent requests are merged into
+micro-batches (bounded by ``max_batch_size`` texts and ``max_wait`` seconds) so the
+model runs batched inference instead of batch-size-1 calls per process.
+
+Wire format for ``POST /embed``: the request body is JSON ``{"texts": [...]}`` with at
+least one text (an empty list is rejected with 400); the response is
+``application/octet-stream`` holding a little-endian uint32 count, a uint32
+dimension, then count * dimension little-endian float32 values.
+
+Run with::
+
+    python -m src.rag.embedding_service --port 8765 --max-batch-size 32 --max-wait-ms 5
+
+The service records metrics for ``GET /metrics`` by default; pass ``--no-metrics`` to
+turn recording off.
+"""
+import json
+import time
+import queue
+import struct
+import logging
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+from src.utils.metrics import metrics, percentiles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+HEADER = struct.Struct("<II")
+
+
+def encode_vectors(vectors: np.ndarray) -> bytes:
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    count, dimension = vectors.shape
+    return HEADER.pack(count, dimension) + vectors.tobytes()
+
+
+def decode_vectors(payload: bytes) -> np.ndarray:
+    count, dimension = HEADER.unpack_from(payload)
+    return np.frombuffer(payload, dtype="<f4", offset=HEADER.size, count=count * dimension).reshape(count, dimension)
+
+
+class TransformerEmbedder:
+    """
+    Batched mean-pooled embeddings from a Hugging Face model.
+
+    Padding is masked out of the mean, so a text gets the same vector whether it is
+    embedded alone or in a batch.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, max_length: int = 512):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.max_length = max_length
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, max_length=self.max_length, padding=True)
+        with self.torch.no_grad():
+            outputs = self.model(**inputs)
+        mask = inputs["attention_mask"].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        summed = (outputs.last_hidden_state * mask).sum(dim=1)
+        return (summed / mask.sum(dim=1).clamp(min=1)).numpy().astype(np.float32)
+
+
+class MicroBatcher:
+    """
+    Merge concurrently submitted texts into batches for one embedding function.
+
+    A worker thread takes the first waiting request, then keeps collecting requests
+    until ``max_batch_size`` texts are queued or ``max_wait`` seconds have passed.
+
+    Args:
+    embed_batch (Callable[[List[str]], np.ndarray]): Embeds a list of texts into a (n, dim) array
+    max_batch_size (int): Maximum texts per model call
+    max_wait (float): Seconds to wait for more requests after the first one arrives
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], np.ndarray], max_batch_size: int = 32,
+                 max_wait: float = 0.005, history: int = 10000):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.batch_sizes: deque = deque(maxlen=history)
+        self.queue_wait: deque = deque(maxlen=history)
+        self.batch_seconds: deque = deque(maxlen=history)
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Queue ``texts`` for embedding; the future resolves to a (len(texts), dim) array."""
+        if not texts:
+            raise ValueError("texts must not be empty")
+        future: Future = Future()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first[0])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        texts = [text for item in batch for text in item[0]]
+        try:
+            with metrics.span("embed_batch"):
+                chunks = [np.asarray(self.embed_batch(texts[i:i + self.max_batch_size]), dtype=np.float32)
+                          for i in range(0, len(texts), self.max_batch_size)]
+            vectors = np.concatenate(chunks)
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(texts)} texts: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - started
+
+        offset = 0
+        for item_texts, future, submitted in batch:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+        with self._lock:
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batches += 1
+            self.batch_sizes.append(len(texts))
+            self.batch_seconds.append(elapsed)
+            self.queue_wait.extend(started - submitted for _, _, submitted in batch)
+
+    def stats(self):
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "texts_per_sec": self.texts / uptime if uptime else 0.0,
+                "queue_wait": percentiles(list(self.queue_wait)),
+                "batch_seconds": percentiles(list(self.batch_seconds)),
+                "max_batch_size": self.max_batch_size,
+                "max_wait": self.max_wait,
+            }
+
+
+class _EmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, the body of every
+    # keep-alive response waits for the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload).encode("utf-8"), "application/json", status)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(self.server.batcher.stats())
+        elif self.path == "/metrics":
+            self._send(metrics.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path != "/embed":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("'texts' must be a list of strings")
+            if not texts:
+                raise ValueError("'texts' must not be empty")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json({"error": f"bad request: {e}"}, status=400)
+            return
+
+        try:
+            vectors = self.server.batcher.embed(texts)
+        except Exception as e:
+            self._send_json({"error": str(e)}, status=500)
+            return
+        self._send(encode_vectors(vectors), "application/octet-stream")
+
+
+class EmbeddingServer(ThreadingHTTPServer):
+    """
+    Localhost HTTP server exposing a MicroBatcher.
+
+    Endpoints: ``POST /embed``, ``GET /stats`` (batching, latency and throughput),
+    ``GET /metrics`` (Prometheus text) and ``GET /health``. ``/metrics`` renders the
+    process-wide ``src.utils.metrics`` registry, so it is empty unless that registry is
+    enabled; ``main`` enables it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, embed_batch: Callable[[List[str]], np.ndarray], host: str = "127.0.0.1", port: int = 8765,
+                 max_batch_size: int = 32, max_wait: float = 0.005):
+        super().__init__((host, port), _EmbeddingHandler)
+        self.batcher = MicroBatcher(embed_batch, max_batch_size=max_batch_size, max_wait=max_wait)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "EmbeddingServer":
+        """Serve on a background thread (used for in-process servers and benchmarks)."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        self.batcher.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class EmbeddingClient:
+    """
+    Client for EmbeddingServer; usable as ``RepoDBImporter(embedding_backend=...)``.
+
+    Keeps one HTTP connection per thread alive between requests.
+    """
+
+    def __init__(self, url: str = "http://127.0.0.1:8765", timeout: float = 60.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            raise ValueError("texts must not be empty")
+        with metrics.span("http_request", endpoint="/embed"):
+            response = self._session.post(f"{self.url}/embed", json={"texts": list(texts)}, timeout=self.timeout)
+            response.raise_for_status()
+        return decode_vectors(response.content)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def stats(self):
+        response = self._session.get(f"{self.url}/stats", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Shared local embedding service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--no-metrics", action="store_true", help="Do not record spans for GET /metrics")
+    args = parser.parse_args(argv)
+
+    # The process-wide registry is off by default; the service exists to be observed.
+    if not args.no_metrics:
+        metrics.enable()
+
+    embedder = TransformerEmbedder(args.model)
+    server = EmbeddingServer(embedder, args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+    logger.info(f"Embedding service for {args.model} listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 import os
+import sys
+
+# Allow running this file directly (python src/rag/github_ops_manager.py): sys.path[0] is then
+# src/rag, so add the project root for the src.* imports below.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
 from github import Github
 from git import Repo, GitCommandError
 from getpass import getpass
 import logging
+from src.utils.metrics import export_metrics, maybe_profile_run, metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,32 +41,37 @@ class GitHubOperationsManager:
     def pull_changes(self):
         try:
             origin = self.local_repo.remotes.origin
-            origin.pull()
+            with metrics.span("git_command", operation="pull"):
+                origin.pull()
             logger.info(f"Pulled latest changes for {self.repo_instance.full_name}")
         except GitCommandError as e:
             logger.error(f"Error pulling changes: {e}")
 
     def push_changes(self, commit_message):
         try:
-            self.local_repo.git.add(A=True)
-            self.local_repo.index.commit(commit_message)
+            with metrics.span("git_command", operation="commit"):
+                self.local_repo.git.add(A=True)
+                self.local_repo.index.commit(commit_message)
             origin = self.local_repo.remotes.origin
-            origin.push()
+            with metrics.span("git_command", operation="push"):
+                origin.push()
             logger.info(f"Pushed changes to {self.repo_instance.full_name} with message: {commit_message}")
         except GitCommandError as e:
             logger.error(f"Error pushing changes: {e}")
 
     def create_branch(self, branch_name):
         try:
-            current = self.local_repo.create_head(branch_name)
-            current.checkout()
+            with metrics.span("git_command", operation="create_branch"):
+                current = self.local_repo.create_head(branch_name)
+                current.checkout()
             logger.info(f"Created and switched to new branch: {branch_name}")
         except GitCommandError as e:
             logger.error(f"Error creating branch: {e}")
 
     def switch_branch(self, branch_name):
         try:
-            self.local_repo.git.checkout(branch_name)
+            with metrics.span("git_command", operation="checkout"):
+                self.local_repo.git.checkout(branch_name)
             logger.info(f"Switched to branch: {branch_name}")
         except GitCommandError as e:
             logger.error(f"Error switching branch: {e}")
@@ -97,8 +111,9 @@ class GitHubOperationsManager:
     def get_file_content(self, file_path):
         try:
             full_file_path = os.path.join(self.local_repo.working_tree_dir, file_path)
-            with open(full_file_path, 'r') as file:
-                content = file.read()
+            with metrics.span("git_command", operation="read_file"):
+                with open(full_file_path, 'r') as file:
+                    content = file.read()
             return content
         except IOError as e:
             logger.error(f"Error reading file {file_path}: {e}")
@@ -107,10 +122,11 @@ class GitHubOperationsManager:
     def update_file_content(self, file_path, new_content, commit_message):
         try:
             full_file_path = os.path.join(self.local_repo.working_tree_dir, file_path)
-            with open(full_file_path, 'w') as file:
-                file.write(new_content)
-            self.local_repo.git.add(file_path)
-            self.local_repo.index.commit(commit_message)
+            with metrics.span("git_command", operation="update_file"):
+                with open(full_file_path, 'w') as file:
+                    file.write(new_content)
+                self.local_repo.git.add(file_path)
+                self.local_repo.index.commit(commit_message)
             logger.info(f"Updated file {file_path} in local repository")
         except IOError as e:
             logger.error(f"Error updating file {file_path}: {e}")
@@ -168,9 +184,11 @@ if __name__ == "__main__":
     
     choice = input("Enter your choice (1-2): ")
     
-    if choice == '1':
-        test_git_operations()
-    elif choice == '2':
-        test_github_operations()
-    else:
-        print("Invalid choice. Please run the script again and select 1 or 2.")
+    with maybe_profile_run():
+        if choice == '1':
+            test_git_operations()
+        elif choice == '2':
+            test_github_operations()
+        else:
+            print("Invalid choice. Please run the script again and select 1 or 2.")
+    export_metrics()
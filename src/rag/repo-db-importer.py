@@ -1,30 +1,51 @@
 import os
+import sys
+
+# Allow running this file directly (python src/rag/repo-db-importer.py): sys.path[0] is then
+# src/rag, so add the project root for the src.* imports below.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
 import ast
 import logging
 from py2neo import Graph, Node, Relationship
 import psycopg2
 from psycopg2.extras import execute_values
 import numpy as np
-from transformers import AutoTokenizer, AutoModel
-import torch
+from src.utils.metrics import export_metrics, maybe_profile_run, metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
 class RepoDBImporter:
-    def __init__(self, neo4j_url, neo4j_user, neo4j_password, pg_connection_string):
+    def __init__(self, neo4j_url, neo4j_user, neo4j_password, pg_connection_string, embedding_backend=None):
+        # embedding_backend: any object with embed_one(text) -> vector, e.g. an EmbeddingClient
+        # for the shared embedding service. When given, the local model is not loaded and
+        # torch/transformers are never imported.
         try:
             self.neo4j_graph = Graph(neo4j_url, auth=(neo4j_user, neo4j_password))
             self.pg_conn = psycopg2.connect(pg_connection_string)
             self.pg_cursor = self.pg_conn.cursor()
-            self.tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-            self.model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+            self.embedding_backend = embedding_backend
+            if embedding_backend is None:
+                self._load_local_model()
             logger.info("Connected to databases and initialized model.")
         except Exception as e:
             logger.error(f"Initialization error: {e}")
             raise
 
+    def _load_local_model(self, model_name=DEFAULT_MODEL, **kwargs):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, **kwargs)
+        self.model = AutoModel.from_pretrained(model_name, **kwargs)
+
     def import_repo(self, repo_path, repo_name):
         try:
             repo_node = Node("Repository", name=repo_name)
@@ -43,54 +64,67 @@ class RepoDBImporter:
                 content = file.read()
 
             file_node = Node("File", name=os.path.basename(file_path), path=file_path)
-            self.neo4j_graph.create(file_node)
-            self.neo4j_graph.create(Relationship(repo_node, "CONTAINS", file_node))
+            with metrics.span("graph_write"):
+                self.neo4j_graph.create(file_node)
+                self.neo4j_graph.create(Relationship(repo_node, "CONTAINS", file_node))
 
             embedding = self.generate_embedding(content)
             vector_id = self.store_embedding(embedding, 'file', file_path)
             file_node['vector_id'] = vector_id
-            self.neo4j_graph.push(file_node)
+            with metrics.span("graph_write"):
+                self.neo4j_graph.push(file_node)
 
-            tree = ast.parse(content)
-            self.process_ast(tree, file_node)
+            with metrics.span("parse"):
+                tree = ast.parse(content)
+            self.process_ast(tree, file_node, content)
+            metrics.increment("files_imported")
         except SyntaxError:
             logger.error(f"Syntax error in file: {file_path}")
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {e}")
 
-    def process_ast(self, tree, parent_node):
+    def process_ast(self, tree, parent_node, source):
         try:
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
                     func_node = Node("Function", name=node.name)
-                    self.neo4j_graph.create(func_node)
-                    self.neo4j_graph.create(Relationship(parent_node, "DEFINES", func_node))
+                    with metrics.span("graph_write"):
+                        self.neo4j_graph.create(func_node)
+                        self.neo4j_graph.create(Relationship(parent_node, "DEFINES", func_node))
 
-                    func_content = ast.get_source_segment(tree.body[0], node)
+                    func_content = ast.get_source_segment(source, node)
                     embedding = self.generate_embedding(func_content)
                     vector_id = self.store_embedding(embedding, 'function', node.name)
                     func_node['vector_id'] = vector_id
-                    self.neo4j_graph.push(func_node)
+                    with metrics.span("graph_write"):
+                        self.neo4j_graph.push(func_node)
+                    metrics.increment("entities_imported", entity_type="function")
 
                 elif isinstance(node, ast.ClassDef):
                     class_node = Node("Class", name=node.name)
-                    self.neo4j_graph.create(class_node)
-                    self.neo4j_graph.create(Relationship(parent_node, "DEFINES", class_node))
+                    with metrics.span("graph_write"):
+                        self.neo4j_graph.create(class_node)
+                        self.neo4j_graph.create(Relationship(parent_node, "DEFINES", class_node))
 
-                    class_content = ast.get_source_segment(tree.body[0], node)
+                    class_content = ast.get_source_segment(source, node)
                     embedding = self.generate_embedding(class_content)
                     vector_id = self.store_embedding(embedding, 'class', node.name)
                     class_node['vector_id'] = vector_id
-                    self.neo4j_graph.push(class_node)
+                    with metrics.span("graph_write"):
+                        self.neo4j_graph.push(class_node)
+                    metrics.increment("entities_imported", entity_type="class")
         except Exception as e:
             logger.error(f"Error processing AST node: {e}")
 
     def generate_embedding(self, text):
         try:
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-            embeddings = outputs.last_hidden_state.mean(dim=1).numpy()
+            with metrics.span("embed"):
+                if self.embedding_backend is not None:
+                    return self.embedding_backend.embed_one(text)
+                inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
+                with self.torch.no_grad():
+                    outputs = self.model(**inputs)
+                embeddings = outputs.last_hidden_state.mean(dim=1).numpy()
             return embeddings[0]
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
@@ -102,9 +136,10 @@ class RepoDBImporter:
             VALUES (%s, %s, %s)
             RETURNING id;
             """
-            self.pg_cursor.execute(query, (embedding.tolist(), entity_type, entity_name))
-            vector_id = self.pg_cursor.fetchone()[0]
-            self.pg_conn.commit()
+            with metrics.span("pg_write"):
+                self.pg_cursor.execute(query, (embedding.tolist(), entity_type, entity_name))
+                vector_id = self.pg_cursor.fetchone()[0]
+                self.pg_conn.commit()
             return vector_id
         except Exception as e:
             logger.error(f"Error storing embedding: {e}")
@@ -124,10 +159,20 @@ if __name__ == "__main__":
     neo4j_password = os.getenv("NEO4J_PASSWORD", "password")
     pg_connection_string = os.getenv("PG_CONNECTION_STRING", "dbname=your_db user=your_user password=your_password host=localhost")
 
-    importer = RepoDBImporter(neo4j_url, neo4j_user, neo4j_password, pg_connection_string)
+    # Point EMBEDDING_SERVICE_URL at a running src.rag.embedding_service to share one model
+    embedding_backend = None
+    if os.getenv("EMBEDDING_SERVICE_URL"):
+        from src.rag.embedding_service import EmbeddingClient
+        embedding_backend = EmbeddingClient(os.getenv("EMBEDDING_SERVICE_URL"))
+
+    importer = RepoDBImporter(neo4j_url, neo4j_user, neo4j_password, pg_connection_string, embedding_backend)
 
     repo_path = "/path/to/cloned/repo"
     repo_name = "example_repo"
 
-    importer.import_repo(repo_path, repo_name)
-    importer.close()
\ No newline at end of file
+    # PANDORAS_PROFILE_DIR profiles the import; PANDORAS_METRICS=1 records spans, which are
+    # written to PANDORAS_METRICS_FILE (or logged) at the end.
+    with maybe_profile_run():
+        importer.import_repo(repo_path, repo_name)
+    importer.close()
+    export_metrics()
\ No newline at end of file
@@ -0,0 +1,10 @@
+import pytest
+
+from src.benchmarks.stand_ins import FakeOllamaServer
+
+
+@pytest.fixture
+def fake_ollama():
+    """A FakeOllamaServer serving on an ephemeral localhost port for the test."""
+    with FakeOllamaServer(tokens_per_response=4) as server:
+        yield server
@@ -0,0 +1,69 @@
+import sys
+
+import pytest
+
+from src.benchmarks.run_benchmarks import bench_repo_importer, build_parser, compare_results
+from src.benchmarks.stand_ins import StubTokenizer, StubTransformerModel, stand_in_modules
+from src.utils.metrics import metrics
+
+
+@pytest.fixture
+def recorded_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+@pytest.mark.parametrize("embedding", ["stub", "service"])
+def test_repo_importer_runs_real_embedding_path(recorded_metrics, embedding):
+    args = build_parser().parse_args([
+        "--embedding", embedding, "--importer-files", "3", "--functions-per-file", "2", "--classes-per-file", "1",
+    ])
+
+    result = bench_repo_importer(args)
+
+    # Per file: two functions, one class and its method.
+    assert result["entities"] == 3 * 4
+    assert result["embeddings_stored"] == 3 + 3 * 4
+    assert result["stage_calls"]["embed"] == result["embeddings_stored"]
+    spans = {span["name"]: span for span in recorded_metrics.snapshot()["spans"]}
+    assert spans["embed"]["count"] == result["embeddings_stored"]
+    assert spans["embed"]["errors"] == 0
+    if embedding == "service":
+        assert spans["embed_batch"]["count"] == result["embeddings_stored"]
+    for name in result["stand_in_modules"]:
+        assert name not in sys.modules
+
+
+def test_stub_model_output_has_transformer_shape():
+    inputs = StubTokenizer()("def f(x): return x", return_tensors="pt", truncation=True, max_length=3, padding=True)
+    outputs = StubTransformerModel(dimension=16)(**inputs)
+
+    pooled = outputs.last_hidden_state.mean(dim=1).numpy()
+
+    assert inputs["input_ids"].shape == (1, 3)
+    assert pooled.shape == (1, 16)
+
+
+def test_stand_in_modules_are_removed_on_exit():
+    with stand_in_modules("psycopg2", "psycopg2.extras") as stubbed:
+        import psycopg2.extras
+
+        if stubbed:
+            assert stubbed == ["psycopg2", "psycopg2.extras"]
+            assert psycopg2.connect().cursor() is not None
+
+    for name in stubbed:
+        assert name not in sys.modules
+
+
+def test_compare_results_reports_ratios_for_shared_metrics():
+    previous = {"benchmarks": {"ollama": {"elapsed": 2.0, "requests": 10, "latency": {"p50": 0.1}}}}
+    current = {"benchmarks": {"ollama": {"elapsed": 1.0, "requests": 10, "ok": True}}}
+
+    assert compare_results(previous, current) == {
+        "ollama.elapsed": {"previous": 2.0, "current": 1.0, "ratio": 0.5},
+        "ollama.requests": {"previous": 10.0, "current": 10.0, "ratio": 1.0},
+    }
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from src.benchmarks.stand_ins import FakeOllamaServer
+from src.utils.chat_session import ChatSession
+from src.utils.ollama_manager import OllamaManager
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def manager_for(server, model=None):
+    return OllamaManager(server.host, server.port, model or server.model)
+
+
+def test_context_is_reused_between_turns(fake_ollama):
+    session = ChatSession(manager_for(fake_ollama), system_prompt="be brief")
+
+    first = session.send("hello there")
+    first_context = session.context
+    second = session.send("and again")
+
+    assert first == second == "tok0 tok1 tok2 tok3"
+    assert [turn["mode"] for turn in session.turns] == ["context", "context"]
+    # The fake server only charges tokens it was sent: turn two carries neither the
+    # system prompt nor the first exchange.
+    assert session.turns[0]["prompt_eval_count"] == 4
+    assert session.turns[1]["prompt_eval_count"] == 2
+    assert session.context[:len(first_context)] == first_context
+    assert len(session.messages) == 4
+
+
+def test_falls_back_to_chat_without_context():
+    with FakeOllamaServer(tokens_per_response=2, return_context=False) as server:
+        session = ChatSession(manager_for(server), system_prompt="be brief")
+
+        session.send("hello there")
+        session.send("and again")
+
+    assert not session.use_context
+    assert session.context is None
+    assert [turn["mode"] for turn in session.turns] == ["context", "chat"]
+    # /api/chat re-sends system prompt, both earlier messages and the new prompt.
+    assert session.turns[1]["prompt_eval_count"] == 2 + 2 + 2 + 2
+
+
+def test_failed_request_leaves_history_unchanged():
+    session = ChatSession(OllamaManager("127.0.0.1", 9, "missing"))
+
+    assert session.send("hello") is None
+    assert session.messages == [] and session.turns == []
+
+
+def test_build_messages_trims_oldest_history_first():
+    session = ChatSession(SimpleNamespace(model="m"), system_prompt="sys tem", max_history_tokens=10,
+                          token_counter=word_count)
+    session.messages = [
+        {"role": "user", "content": "one two three"},
+        {"role": "assistant", "content": "four five"},
+        {"role": "user", "content": "six"},
+        {"role": "assistant", "content": "seven eight"},
+    ]
+
+    messages = session.build_messages("new prompt here")
+
+    # Budget 10 - 3 (prompt) - 2 (system) = 5 tokens: the last three messages fit,
+    # the oldest does not.
+    assert [m["content"] for m in messages] == ["sys tem", "four five", "six", "seven eight", "new prompt here"]
+    assert messages[0]["role"] == "system"
+    assert messages[-1] == {"role": "user", "content": "new prompt here"}
+
+
+def test_build_messages_keeps_prompt_when_over_budget():
+    session = ChatSession(SimpleNamespace(model="m"), max_history_tokens=2, token_counter=word_count)
+    session.messages = [{"role": "user", "content": "old"}]
+
+    assert session.build_messages("a much longer prompt") == [{"role": "user", "content": "a much longer prompt"}]
+
+
+def test_load_reuses_context_for_same_model(tmp_path):
+    path = str(tmp_path / "session.json")
+    session = ChatSession(SimpleNamespace(model="llama3"), system_prompt="sys")
+    session.context = [1, 2, 3]
+    session.messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    session.save(path)
+
+    restored = ChatSession.load(path, SimpleNamespace(model="llama3"))
+
+    assert restored.use_context
+    assert restored.context == [1, 2, 3]
+    assert restored.messages == session.messages
+    assert restored.system_prompt == "sys"
+
+
+def test_load_with_other_model_replays_history(tmp_path, fake_ollama):
+    path = str(tmp_path / "session.json")
+    session = ChatSession(SimpleNamespace(model="llama3"))
+    session.context = [1, 2, 3]
+    session.messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    session.save(path)
+
+    restored = ChatSession.load(path, manager_for(fake_ollama))
+    restored.send("next")
+
+    assert not restored.use_context
+    assert restored.context is None
+    assert restored.turns[-1]["mode"] == "chat"
+    assert restored.turns[-1]["prompt_eval_count"] == 3
@@ -0,0 +1,101 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+CODEBOX_PATH = Path(__file__).resolve().parents[2] / "docs" / "ideas" / "PandorasCodeBox.py"
+
+
+@pytest.fixture(scope="module")
+def codebox():
+    spec = importlib.util.spec_from_file_location("pandoras_code_box", str(CODEBOX_PATH))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+SECRETS = ("db_password", "hunter2-prod-secret", "prod creds", "10.0.0.5")
+
+
+@pytest.mark.parametrize("separator", ["\x0c\n", "\n\x0c", "\x0c"])
+def test_form_feeds_do_not_shift_placeholders(codebox, separator):
+    code = (
+        "import os\n"
+        + separator * 4 + "\n"
+        + 'db_password = "hunter2-prod-secret"  # prod creds for 10.0.0.5\n'
+        + "connect(password=db_password)\n"
+    )
+    sanitizer = codebox.CodeSanitizer(identifiers={"db_password"})
+
+    sanitized = sanitizer.sanitize(code)
+
+    for secret in SECRETS:
+        assert secret not in sanitized
+    assert sanitized.count("\n") == code.count("\n")
+    assert sanitizer.desanitize(sanitized) == code
+
+
+def test_line_separator_characters_inside_literals_and_comments(codebox):
+    code = (
+        'token = "abc\u2028def-secret"  # owner\u2028alice\x85bob\n'
+        "value = token\v + '\x1ckey\x1e'  # \x0cnote\n"
+    )
+    sanitizer = codebox.CodeSanitizer(identifiers={"token"})
+
+    sanitized = sanitizer.sanitize(code)
+
+    for original in ("token", "abc", "def-secret", "owner", "alice", "bob", "key", "note"):
+        assert original not in sanitized
+    assert sanitizer.desanitize(sanitized) == code
+
+
+def test_identifiers_share_one_placeholder(codebox):
+    sanitizer = codebox.CodeSanitizer(identifiers={"api_key"})
+
+    sanitized = sanitizer.sanitize("api_key = load()\nsend(api_key)\n")
+
+    assert sanitized == "PBX_I0 = load()\nsend(PBX_I0)\n"
+
+
+def test_untokenizable_code_raises_value_error(codebox):
+    with pytest.raises(ValueError):
+        codebox.CodeSanitizer().sanitize('x = """unterminated\n')
+
+
+def test_box_restores_duplicate_lines_by_position(codebox):
+    code = 'x = 1\nprint("a")\nx = 1\nprint("b")\nx = 1\n'
+    box = codebox.PandorasBox(codebox.CodeSanitizer(), seed=3)
+
+    shuffled = box.process_code_block(code)
+
+    assert sorted(shuffled.split("\n")) == sorted(box.sanitized_lines)
+    assert box.revert_code_order(shuffled) == code
+
+
+def test_box_rejects_changed_line_count(codebox):
+    box = codebox.PandorasBox(codebox.CodeSanitizer(), seed=0)
+    shuffled = box.process_code_block("a = 1\nb = 2\n")
+
+    with pytest.raises(ValueError):
+        box.revert_code_order(shuffled + "\nextra")
+
+
+@pytest.mark.parametrize("code", [
+    'PBX_I0 = "x"\nprint(PBX_I0)\n',
+    'y = "PBX_S0"  # PBX_C1\nPBX1_I0 = "PBX_S0"\n',
+])
+def test_source_containing_placeholders_round_trips(codebox, code):
+    sanitizer = codebox.CodeSanitizer(identifiers={"y"})
+
+    sanitized = sanitizer.sanitize(code)
+
+    assert sanitizer.prefix + "_" not in code
+    assert sanitizer.desanitize(sanitized) == code
+
+
+def test_prefix_collision_after_placeholders_were_issued_raises(codebox):
+    sanitizer = codebox.CodeSanitizer()
+    sanitizer.sanitize('x = "a"\n')
+
+    with pytest.raises(ValueError):
+        sanitizer.sanitize("PBX_I0 = 1\n")
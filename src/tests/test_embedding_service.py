@@ -0,0 +1,186 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+import requests
+
+from src.benchmarks.stand_ins import StubEmbedder
+from src.rag.embedding_service import (
+    EmbeddingClient,
+    EmbeddingServer,
+    MicroBatcher,
+    _EmbeddingHandler,
+    decode_vectors,
+    encode_vectors,
+)
+from src.utils.metrics import metrics
+
+
+class RecordingEmbedder:
+    """Embeds text i as [len(text), i-th call]; records every batch it is given."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return np.array([[len(text), len(self.batches)] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def batcher_factory():
+    batchers = []
+
+    def make(embed_batch, **kwargs):
+        batcher = MicroBatcher(embed_batch, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.stop()
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 384), (0, 8)])
+def test_vectors_round_trip(shape):
+    vectors = np.random.default_rng(0).standard_normal(shape).astype(np.float64)
+
+    decoded = decode_vectors(encode_vectors(vectors))
+
+    assert decoded.shape == shape
+    assert decoded.dtype == np.dtype("<f4")
+    np.testing.assert_array_equal(decoded, vectors.astype(np.float32))
+
+
+def test_encoded_header_is_count_and_dimension():
+    payload = encode_vectors(np.ones((2, 3)))
+
+    assert payload[:8] == b"\x02\x00\x00\x00\x03\x00\x00\x00"
+    assert len(payload) == 8 + 2 * 3 * 4
+
+
+def test_large_request_is_split_into_max_batch_size_chunks(batcher_factory):
+    embedder = RecordingEmbedder()
+    batcher = batcher_factory(embedder, max_batch_size=4, max_wait=0)
+    texts = ["x" * n for n in range(1, 11)]
+
+    vectors = batcher.embed(texts)
+
+    assert [len(batch) for batch in embedder.batches] == [4, 4, 2]
+    assert vectors.shape == (10, 2)
+    assert vectors[:, 0].tolist() == list(range(1, 11))
+
+
+def test_concurrent_requests_share_a_batch(batcher_factory):
+    embedder = RecordingEmbedder()
+    batcher = batcher_factory(embedder, max_batch_size=8, max_wait=0.5)
+
+    futures = [batcher.submit([f"text {i}", "y" * i]) for i in range(4)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert len(embedder.batches) == 1
+    assert [result.shape for result in results] == [(2, 2)] * 4
+    assert [result[1, 0] for result in results] == [0, 1, 2, 3]
+    assert batcher.stats()["mean_batch_size"] == 8
+
+
+def test_embedding_error_reaches_every_waiting_request(batcher_factory):
+    batcher = batcher_factory(RecordingEmbedder(fail=True), max_batch_size=8, max_wait=0.2)
+
+    futures = [batcher.submit([str(i)]) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model exploded"):
+            future.result(timeout=5)
+    assert batcher.stats()["batches"] == 0
+
+
+def test_empty_submission_is_rejected(batcher_factory):
+    batcher = batcher_factory(RecordingEmbedder())
+
+    with pytest.raises(ValueError):
+        batcher.submit([])
+
+
+@pytest.fixture
+def embedding_server():
+    with EmbeddingServer(StubEmbedder(dimension=8).embed_batch, port=0, max_wait=0.001) as server:
+        yield server
+
+
+def test_server_round_trip_matches_embedder(embedding_server):
+    client = EmbeddingClient(embedding_server.url)
+
+    vectors = client.embed(["alpha", "beta"])
+
+    np.testing.assert_array_equal(vectors, StubEmbedder(dimension=8).embed_batch(["alpha", "beta"]))
+    np.testing.assert_array_equal(client.embed_one("alpha"), vectors[0])
+    assert client.stats()["texts"] == 3
+
+
+@pytest.mark.parametrize("body", [{"texts": []}, {"texts": "alpha"}, {"texts": [1]}, {"text": ["a"]}])
+def test_server_rejects_bad_requests(embedding_server, body):
+    response = requests.post(f"{embedding_server.url}/embed", json=body)
+
+    assert response.status_code == 400
+
+
+def test_client_rejects_empty_input_without_a_request(embedding_server):
+    client = EmbeddingClient(embedding_server.url)
+
+    with pytest.raises(ValueError):
+        client.embed([])
+    assert client.stats()["requests"] == 0
+
+
+def test_server_concurrent_clients_are_batched():
+    embedder = RecordingEmbedder()
+    with EmbeddingServer(embedder, port=0, max_batch_size=32, max_wait=0.2) as server:
+        client = EmbeddingClient(server.url)
+        results = [None] * 6
+
+        def worker(i):
+            results[i] = client.embed_one("z" * i)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert [result[0] for result in results] == list(range(6))
+    assert len(embedder.batches) < 6
+
+
+def test_metrics_endpoint_reports_batches_when_enabled(embedding_server):
+    metrics.reset()
+    metrics.enable()
+    try:
+        EmbeddingClient(embedding_server.url).embed(["alpha"])
+        body = requests.get(f"{embedding_server.url}/metrics").text
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+    assert 'span="embed_batch"' in body
+    assert 'pandoraslock_span_errors_total{span="embed_batch"} 0' in body
+
+
+def test_accepted_connections_disable_nagle(monkeypatch):
+    nodelay = []
+    original_setup = _EmbeddingHandler.setup
+
+    def setup(handler):
+        original_setup(handler)
+        nodelay.append(handler.connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+
+    monkeypatch.setattr(_EmbeddingHandler, "setup", setup)
+    with EmbeddingServer(StubEmbedder(dimension=8).embed_batch, port=0) as server:
+        EmbeddingClient(server.url).embed_one("alpha")
+
+    # Without TCP_NODELAY every keep-alive response body waits for the client's delayed ACK.
+    assert nodelay and all(nodelay)
@@ -0,0 +1,130 @@
+import re
+
+import pytest
+
+from src.utils.entity_cascade import EntityCascade, _covered, _parse_verdicts
+
+
+class ScriptedManager:
+    """Answers every prompt by labelling each listed item with ``label_for(span text)``."""
+
+    def __init__(self, label_for=lambda span: "NONE", reply=None):
+        self.label_for = label_for
+        self.reply = reply
+        self.prompts = []
+
+    def generate_response(self, prompt):
+        self.prompts.append(prompt)
+        if self.reply is not None:
+            return self.reply
+        items = re.findall(r"^(\d+)\. \(looks like \w+\) .*?\[\[(.*?)\]\]", prompt, re.M)
+        verdicts = ", ".join(f'{{"id": {i}, "label": "{self.label_for(span)}"}}' for i, span in items)
+        return f"Here you go: [{verdicts}]"
+
+
+def test_prefilter_confident_hits_claim_their_span_first():
+    cascade = EntityCascade(ScriptedManager())
+    text = "mail bob.smith@example.com from 10.0.0.5, token=abcd1234 account 12345678"
+
+    confident, candidates = cascade._prefilter(text)
+
+    assert [(text[s:e], label) for s, e, label in confident] == [
+        ("10.0.0.5", "IP_ADDRESS"),
+        ("bob.smith@example.com", "EMAIL"),
+    ]
+    # The credential pattern only claims its capture group, and the account number
+    # inside it is not claimed a second time.
+    assert [(text[s:e], label) for s, e, label in candidates] == [
+        ("abcd1234", "CREDENTIAL"),
+        ("12345678", "ACCOUNT_NUMBER"),
+    ]
+
+
+def test_prefilter_rejects_every_kind_of_overlap():
+    cascade = EntityCascade(
+        ScriptedManager(),
+        confident_patterns={"MID": r"cdef"},
+        candidate_patterns={"LEFT": r"abcd", "RIGHT": r"efgh", "INSIDE": r"de", "AROUND": r"abcdefghij", "APART": r"ij"},
+    )
+
+    confident, candidates = cascade._prefilter("abcdefghij")
+
+    assert confident == [(2, 6, "MID")]
+    assert candidates == [(8, 10, "APART")]
+
+
+def test_classify_uses_llm_verdicts_and_cache():
+    manager = ScriptedManager(lambda span: "CREDENTIAL" if span == "hunter2" else "NONE")
+    cascade = EntityCascade(manager)
+
+    entities, stats = cascade.classify("password=hunter2 and Alice Jones at 10.1.2.3")
+    again, again_stats = cascade.classify("pwd: hunter2")
+
+    assert [(e.text, e.label, e.source) for e in entities] == [
+        ("hunter2", "CREDENTIAL", "llm"),
+        ("10.1.2.3", "IP_ADDRESS", "regex"),
+    ]
+    assert stats["llm_calls"] == 1 and stats["llm_spans"] == 2
+    assert 0 < stats["llm_fraction"] <= 1
+    assert [(e.text, e.source) for e in again] == [("hunter2", "cache")]
+    assert again_stats["cache_hits"] == 1 and again_stats["llm_calls"] == 0
+    assert len(manager.prompts) == 1
+
+
+def test_unparseable_reply_keeps_candidate_labels_uncached():
+    cascade = EntityCascade(ScriptedManager(reply="I cannot help with that."))
+
+    entities, _ = cascade.classify("token=abcd1234")
+
+    assert [(e.text, e.label, e.source) for e in entities] == [("abcd1234", "CREDENTIAL", "fallback")]
+    assert cascade._cache_get(("abcd1234", "CREDENTIAL")) is None
+
+
+@pytest.mark.parametrize("response", [
+    None,
+    "",
+    "no json here",
+    "[not json]",
+    '{"id": 0, "label": "EMAIL"}',
+    "] backwards [",
+])
+def test_parse_verdicts_rejects_unusable_replies(response):
+    assert _parse_verdicts(response, 3) is None
+
+
+def test_parse_verdicts_skips_bad_items():
+    response = (
+        'Sure! [{"id": 0, "label": "email"}, {"id": "1", "label": "PERSON"}, {"id": 2, "label": "PHONE"},'
+        ' {"id": 7, "label": "NONE"}, {"id": null, "label": "NONE"}, "junk", {"label": "SECRET"}]'
+    )
+
+    assert _parse_verdicts(response, 3) == {0: "EMAIL", 1: "PERSON"}
+    assert _parse_verdicts('{"items": 1} [1, 2]', 3) == {}
+
+
+def test_cache_evicts_least_recently_used():
+    cascade = EntityCascade(ScriptedManager(), cache_size=2)
+    cascade._cache_put(("a", "SECRET"), "NONE")
+    cascade._cache_put(("b", "SECRET"), "SECRET")
+    cascade._cache_get(("a", "SECRET"))
+    cascade._cache_put(("c", "SECRET"), "NONE")
+
+    assert cascade._cache_get(("b", "SECRET")) is None
+    assert cascade._cache_get(("a", "SECRET")) == "NONE"
+    assert cascade._cache_get(("c", "SECRET")) == "NONE"
+
+    cascade.clear_cache()
+    assert cascade._cache_get(("a", "SECRET")) is None
+
+
+@pytest.mark.parametrize("windows, covered", [
+    ([], 0),
+    ([(0, 10)], 10),
+    ([(0, 10), (5, 15)], 15),
+    ([(20, 30), (0, 10)], 20),
+    ([(0, 10), (10, 12)], 12),
+    ([(0, 10), (2, 4), (3, 12)], 12),
+    ([(0, 0), (4, 4)], 0),
+])
+def test_covered_counts_union_of_windows(windows, covered):
+    assert _covered(windows) == covered
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from src.utils.metrics import MetricsRegistry, export_metrics, percentiles
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+
+    first = registry.span("parse", file="a.py")
+    with first:
+        pass
+    registry.increment("files_imported")
+
+    assert first is registry.span("embed")
+    assert registry.snapshot() == {"counters": [], "spans": []}
+    assert registry.to_prometheus() == "\n"
+
+
+def test_span_records_latency_and_errors():
+    registry = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+
+    registry.observe("embed", 0.05)
+    registry.observe("embed", 0.5)
+    registry.observe("embed", 5.0, error=True)
+
+    with pytest.raises(RuntimeError):
+        with registry.span("parse"):
+            raise RuntimeError("boom")
+
+    spans = {span["name"]: span for span in registry.snapshot()["spans"]}
+    assert spans["embed"]["count"] == 3
+    assert spans["embed"]["errors"] == 1
+    assert spans["embed"]["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
+    assert spans["parse"]["errors"] == 1
+
+
+def test_prometheus_buckets_errors_and_counters():
+    registry = MetricsRegistry(enabled=True, namespace="pl", buckets=(0.1, 1.0))
+    registry.observe("embed", 0.05)
+    registry.observe("embed", 2.0, error=True)
+    registry.increment("files_imported", 3)
+
+    lines = registry.to_prometheus().splitlines()
+
+    assert "# TYPE pl_files_imported_total counter" in lines
+    assert "pl_files_imported_total 3" in lines
+    assert "# TYPE pl_span_duration_seconds histogram" in lines
+    assert 'pl_span_duration_seconds_bucket{span="embed",le="0.1"} 1' in lines
+    assert 'pl_span_duration_seconds_bucket{span="embed",le="1.0"} 1' in lines
+    assert 'pl_span_duration_seconds_bucket{span="embed",le="+Inf"} 2' in lines
+    assert 'pl_span_duration_seconds_sum{span="embed"} 2.05' in lines
+    assert 'pl_span_duration_seconds_count{span="embed"} 2' in lines
+    assert "# TYPE pl_span_errors_total counter" in lines
+    assert 'pl_span_errors_total{span="embed"} 1' in lines
+
+
+def test_prometheus_label_values_are_escaped():
+    registry = MetricsRegistry(enabled=True, namespace="pl")
+    registry.increment("git_errors", operation='say "hi"\\now\nnext')
+
+    assert 'pl_git_errors_total{operation="say \\"hi\\"\\\\now\\nnext"} 1' in registry.to_prometheus()
+
+
+def test_snapshot_is_json_serialisable_and_sorted():
+    registry = MetricsRegistry(enabled=True)
+    registry.increment("b")
+    registry.increment("a", operation="pull")
+    registry.increment("a", operation="pull")
+    with registry.span("http_request", endpoint="/api/generate"):
+        pass
+
+    snapshot = json.loads(registry.to_json())
+
+    assert snapshot["counters"] == [
+        {"name": "a", "labels": {"operation": "pull"}, "value": 2},
+        {"name": "b", "labels": {}, "value": 1},
+    ]
+    assert snapshot["spans"][0]["labels"] == {"endpoint": "/api/generate"}
+    assert snapshot["spans"][0]["count"] == 1
+
+    registry.reset()
+    assert registry.snapshot() == {"counters": [], "spans": []}
+
+
+def test_timed_decorator_records_calls():
+    registry = MetricsRegistry(enabled=True)
+
+    @registry.timed("work", stage="a")
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    assert registry.snapshot()["spans"][0]["count"] == 1
+
+
+def test_percentiles_interpolates():
+    summary = percentiles([0.4, 0.1, 0.2, 0.3])
+
+    assert percentiles([]) == {}
+    assert summary["min"] == 0.1 and summary["max"] == 0.4
+    assert abs(summary["p50"] - 0.25) < 1e-9
+
+
+def test_export_metrics_writes_prometheus_or_json(tmp_path, monkeypatch):
+    registry = MetricsRegistry(enabled=True, namespace="pl")
+    registry.increment("files_imported", 2)
+    monkeypatch.setenv("PANDORAS_METRICS_FILE", str(tmp_path / "run.prom"))
+
+    export_metrics(registry=registry)
+    export_metrics(str(tmp_path / "run.json"), registry)
+
+    assert "pl_files_imported_total 2" in (tmp_path / "run.prom").read_text()
+    assert json.loads((tmp_path / "run.json").read_text())["counters"][0]["value"] == 2
+
+
+def test_export_metrics_logs_without_a_file_and_skips_when_disabled(tmp_path, monkeypatch, caplog):
+    monkeypatch.delenv("PANDORAS_METRICS_FILE", raising=False)
+    registry = MetricsRegistry(enabled=True)
+    registry.increment("files_imported")
+
+    with caplog.at_level("INFO", logger="src.utils.metrics"):
+        export_metrics(registry=registry)
+    assert '"files_imported"' in caplog.text
+
+    registry.disable()
+    export_metrics(str(tmp_path / "off.json"), registry)
+    assert not (tmp_path / "off.json").exists()
@@ -0,0 +1,50 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.benchmarks.run_benchmarks import PROJECT_ROOT, load_module_from_path
+from src.benchmarks.stand_ins import InMemoryGraph, InMemoryPgConnection, StubEmbedder, stand_in_modules
+
+
+@pytest.fixture
+def importer_module(monkeypatch):
+    with stand_in_modules("py2neo", "psycopg2", "psycopg2.extras"):
+        module = load_module_from_path("repo_db_importer", PROJECT_ROOT / "src" / "rag" / "repo-db-importer.py")
+    # Keep real database clients, when installed, from connecting anywhere.
+    monkeypatch.setattr(module, "Graph", InMemoryGraph)
+    monkeypatch.setattr(module, "psycopg2", SimpleNamespace(connect=lambda dsn: InMemoryPgConnection()))
+    return module
+
+
+class ListBackend:
+    def __init__(self):
+        self.texts = []
+        self.embedder = StubEmbedder(dimension=4)
+
+    def embed_one(self, text):
+        self.texts.append(text)
+        return self.embedder(text)
+
+
+def test_embedding_backend_skips_local_model(importer_module, monkeypatch):
+    # Make any attempt to import the model stack fail loudly.
+    monkeypatch.setitem(sys.modules, "torch", None)
+    monkeypatch.setitem(sys.modules, "transformers", None)
+    backend = ListBackend()
+
+    importer = importer_module.RepoDBImporter("bolt://db:7687", "neo4j", "pw", "dbname=x", embedding_backend=backend)
+    vector = importer.generate_embedding("def f(): pass")
+
+    assert not hasattr(importer, "model") and not hasattr(importer, "torch")
+    assert backend.texts == ["def f(): pass"]
+    np.testing.assert_array_equal(vector, backend.embedder("def f(): pass"))
+
+
+def test_local_model_is_loaded_without_backend(importer_module, monkeypatch):
+    monkeypatch.setitem(sys.modules, "torch", None)
+    monkeypatch.setitem(sys.modules, "transformers", None)
+
+    with pytest.raises(ImportError):
+        importer_module.RepoDBImporter("bolt://db:7687", "neo4j", "pw", "dbname=x")
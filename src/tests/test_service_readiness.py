@@ -0,0 +1,187 @@
+import socket
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.service_readiness import (
+    BOLT_MAGIC,
+    BoltProbe,
+    HttpProbe,
+    PostgresProbe,
+    ServiceReadinessOrchestrator,
+    TcpProbe,
+    ollama_endpoints,
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def listen_on(port, handle, delay=0.0):
+    """Start listening on ``port`` after ``delay`` seconds and pass each connection to ``handle``."""
+    stop = threading.Event()
+    listening = threading.Event()
+
+    def run():
+        time.sleep(delay)
+        with socket.socket() as listener:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind(("127.0.0.1", port))
+            listener.listen()
+            listener.settimeout(0.05)
+            listening.set()
+            while not stop.is_set():
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    handle(conn)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return stop, listening
+
+
+def fast_orchestrator(probes, timeout):
+    return ServiceReadinessOrchestrator(probes, timeout=timeout, initial_delay=0.02, max_delay=0.05)
+
+
+def test_late_listener_reports_time_to_ready():
+    port = free_port()
+    stop, _ = listen_on(port, lambda conn: None, delay=0.3)
+    try:
+        report = fast_orchestrator([TcpProbe("late", "127.0.0.1", port)], timeout=5).wait_until_ready()
+    finally:
+        stop.set()
+
+    status = report.statuses["late"]
+    assert report.all_ready
+    assert status.attempts > 1
+    assert 0.3 <= status.time_to_ready < 2.0
+    assert report.elapsed >= status.time_to_ready
+
+
+def test_never_ready_service_stops_at_deadline():
+    port = free_port()
+
+    started = time.monotonic()
+    report = fast_orchestrator([TcpProbe("down", "127.0.0.1", port, timeout=0.1)], timeout=0.3).wait_until_ready()
+    elapsed = time.monotonic() - started
+
+    status = report.statuses["down"]
+    assert not report
+    assert report.not_ready == ["down"]
+    assert status.time_to_ready is None
+    assert status.attempts > 1
+    assert "ConnectionRefusedError" in status.last_error
+    assert 0.3 <= elapsed < 1.0
+
+
+@pytest.mark.parametrize("make_probe", [
+    lambda port: BoltProbe("neo4j", "127.0.0.1", port),
+    lambda port: HttpProbe("ollama", f"http://127.0.0.1:{port}/api/tags"),
+], ids=["bolt", "http"])
+def test_silent_service_does_not_overrun_deadline(make_probe):
+    port = free_port()
+    stop, listening = listen_on(port, lambda conn: stop.wait(5))
+    try:
+        assert listening.wait(2)
+        probe = make_probe(port)
+        assert probe.timeout == 2.0
+
+        report = fast_orchestrator([probe], timeout=0.5).wait_until_ready()
+    finally:
+        stop.set()
+
+    assert not report
+    last_error = report.statuses[probe.name].last_error.lower()
+    assert "timeout" in last_error or "timed out" in last_error
+    assert 0.5 <= report.elapsed < 0.8
+
+
+def test_postgres_probe_clamps_connect_timeout(monkeypatch):
+    timeouts = []
+
+    def connect(connect_timeout, **params):
+        timeouts.append(connect_timeout)
+        return SimpleNamespace(close=lambda: None)
+
+    monkeypatch.setitem(sys.modules, "psycopg2", SimpleNamespace(connect=connect))
+    probe = PostgresProbe("postgres", {"host": "db", "port": 5432}, timeout=10)
+
+    assert probe.check(timeout=3.7)
+    assert probe.check()
+    with pytest.raises(TimeoutError):
+        probe.check(timeout=1.5)
+    assert timeouts == [3, 10]
+
+
+@pytest.mark.parametrize("reply, ready", [
+    (b"\x00\x00\x04\x04", True),
+    (b"\x00\x00\x00\x00", False),
+])
+def test_bolt_probe_checks_handshake_reply(reply, ready):
+    received = []
+
+    def handshake(conn):
+        data = b""
+        while len(data) < 20:
+            chunk = conn.recv(20 - len(data))
+            if not chunk:
+                break
+            data += chunk
+        received.append(data)
+        conn.sendall(reply)
+
+    port = free_port()
+    stop, listening = listen_on(port, handshake)
+    try:
+        assert listening.wait(2)
+        assert BoltProbe("neo4j", "127.0.0.1", port).check() is ready
+    finally:
+        stop.set()
+
+    assert received[0][:4] == BOLT_MAGIC
+    assert len(received[0]) == 20
+
+
+def test_http_probe_against_fake_ollama(fake_ollama):
+    assert HttpProbe("ollama", f"{fake_ollama.base_url}/api/tags").check()
+    assert not HttpProbe("ollama", f"{fake_ollama.base_url}/missing").check()
+
+
+def test_orchestrator_waits_for_http_and_tcp_together(fake_ollama):
+    probes = [
+        HttpProbe("ollama", f"{fake_ollama.base_url}/api/tags"),
+        TcpProbe("ollama_tcp", fake_ollama.host, fake_ollama.port),
+    ]
+
+    report = fast_orchestrator(probes, timeout=5).wait_until_ready()
+
+    assert report.all_ready
+    assert set(report.to_dict()["services"]) == {"ollama", "ollama_tcp"}
+
+
+def test_ollama_endpoints_maps_bind_all_hosts_to_localhost():
+    config = SimpleNamespace(
+        OLLAMA_MAIN_HOST="0.0.0.0", OLLAMA_MAIN_PORT=11434,
+        OLLAMA_EMBED_PORT="11435",
+        OLLAMA_GPU_HOST="gpu-box", OLLAMA_GPU_PORT=11436,
+        OLLAMA_V6_HOST="::", OLLAMA_V6_PORT=11437,
+        OLLAMA_OFF_PORT=None,
+        OLLAMA_MODEL="llama3",
+    )
+
+    assert ollama_endpoints(config) == {
+        "ollama_embed": "http://localhost:11435",
+        "ollama_gpu": "http://gpu-box:11436",
+        "ollama_main": "http://localhost:11434",
+        "ollama_v6": "http://localhost:11437",
+    }
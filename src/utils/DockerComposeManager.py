@@ -19,8 +19,16 @@ class DockerComposeManager:
             print(f"Error executing command: {e}")
             print(e.stderr)
 
-    def start_containers(self):
+    def start_containers(self, readiness=None):
+        """
+        Start the stack in the background.
+
+        If a ServiceReadinessOrchestrator is passed as ``readiness``, block until its
+        services are healthy (or its deadline passes) and return the ReadinessReport.
+        """
         self.run_command("up -d")
+        if readiness is not None:
+            return readiness.wait_until_ready()
 
     def stop_containers(self):
         self.run_command("down")
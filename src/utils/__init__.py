@@ -1,5 +1,28 @@
-from .ollama_manager import OllamaManager
-from .docker_compose_utils import DockerComposeManager
-from .config_utils import Config
+import importlib
 
-__all__ = ['OllamaManager', 'DockerComposeManager', 'Config']
\ No newline at end of file
+# Exports are imported on first access so that importing a light submodule such as
+# src.utils.metrics does not pull in docker, requests and the rest of the package.
+_EXPORTS = {
+    'OllamaManager': '.ollama_manager',
+    'DockerComposeManager': '.DockerComposeManager',
+    'Config': '.config_utils',
+    'ServiceReadinessOrchestrator': '.service_readiness',
+    'MetricsRegistry': '.metrics',
+    'ChatSession': '.chat_session',
+    'EntityCascade': '.entity_cascade',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,151 @@
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def approximate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used when no tokenizer is supplied."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ChatSession:
+    """
+    Multi-turn conversation with an Ollama model.
+
+    By default each turn goes to ``/api/generate`` with the ``context`` array returned
+    by the previous turn, so the model resumes from its cached state and only the new
+    prompt has to be evaluated. If the server stops returning a context, or
+    ``use_context`` is False, turns go to ``/api/chat`` with the history trimmed to
+    ``max_history_tokens``.
+
+    Args:
+    ollama_manager (OllamaManager): Client used for the requests
+    system_prompt (str): Optional system prompt for the conversation
+    max_history_tokens (int): Token budget for history sent through ``/api/chat``
+    use_context (bool): Reuse Ollama's context tokens between turns
+    token_counter (Callable[[str], int]): Token estimator for history trimming
+    """
+
+    def __init__(self, ollama_manager, system_prompt: Optional[str] = None, max_history_tokens: int = 4096,
+                 use_context: bool = True, token_counter: Callable[[str], int] = approximate_tokens):
+        self.ollama_manager = ollama_manager
+        self.system_prompt = system_prompt
+        self.max_history_tokens = max_history_tokens
+        self.use_context = use_context
+        self.token_counter = token_counter
+        self.context: Optional[List[int]] = None
+        self.messages: List[Dict[str, str]] = []
+        self.turns: List[Dict[str, Any]] = []
+
+    def send(self, prompt: str) -> Optional[str]:
+        """Send one user turn and return the model's reply, or None if the request failed."""
+        start = time.perf_counter()
+        if self.use_context:
+            mode = "context"
+            response, final_chunk = self.ollama_manager.generate_with_context(
+                prompt, self.context, system=self.system_prompt if self.context is None else None
+            )
+            if response is not None:
+                if final_chunk.get("context"):
+                    self.context = final_chunk["context"]
+                else:
+                    logger.info("Ollama returned no context; falling back to /api/chat with trimmed history")
+                    self.use_context = False
+                    self.context = None
+        else:
+            mode = "chat"
+            response, final_chunk = self.ollama_manager.chat(self.build_messages(prompt))
+
+        if response is None:
+            return None
+
+        self.messages.append({"role": "user", "content": prompt})
+        self.messages.append({"role": "assistant", "content": response})
+        self.turns.append({
+            "turn": len(self.turns) + 1,
+            "mode": mode,
+            "wall_time": time.perf_counter() - start,
+            "prompt_eval_count": final_chunk.get("prompt_eval_count"),
+            "prompt_eval_duration": _seconds(final_chunk.get("prompt_eval_duration")),
+            "eval_count": final_chunk.get("eval_count"),
+            "eval_duration": _seconds(final_chunk.get("eval_duration")),
+        })
+        return response
+
+    def build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """
+        Build the ``/api/chat`` message list for ``prompt``.
+
+        The system prompt and the new prompt are always kept; older history is dropped,
+        oldest first, until the rest fits in ``max_history_tokens``.
+        """
+        budget = self.max_history_tokens - self.token_counter(prompt)
+        if self.system_prompt:
+            budget -= self.token_counter(self.system_prompt)
+
+        kept: List[Dict[str, str]] = []
+        for message in reversed(self.messages):
+            cost = self.token_counter(message["content"])
+            if cost > budget:
+                break
+            budget -= cost
+            kept.append(message)
+        kept.reverse()
+
+        messages = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        return messages + kept + [{"role": "user", "content": prompt}]
+
+    def reset(self) -> None:
+        self.context = None
+        self.messages = []
+        self.turns = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.ollama_manager.model,
+            "system_prompt": self.system_prompt,
+            "max_history_tokens": self.max_history_tokens,
+            "use_context": self.use_context,
+            "context": self.context,
+            "messages": self.messages,
+            "turns": self.turns,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        logger.info(f"Saved chat session ({len(self.turns)} turns) to {path}")
+
+    @classmethod
+    def load(cls, path: str, ollama_manager, **kwargs) -> "ChatSession":
+        """
+        Restore a session saved with ``save``.
+
+        The stored context is only reused when it was produced by the same model;
+        otherwise the session continues from the saved message history.
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        session = cls(
+            ollama_manager,
+            system_prompt=data.get("system_prompt"),
+            max_history_tokens=data.get("max_history_tokens", 4096),
+            use_context=data.get("use_context", True),
+            **kwargs
+        )
+        session.messages = data.get("messages", [])
+        session.turns = data.get("turns", [])
+        if data.get("model") == ollama_manager.model:
+            session.context = data.get("context")
+        else:
+            logger.info(f"Saved context belongs to model {data.get('model')}; replaying history via /api/chat")
+            session.use_context = False
+        return session
+
+
+def _seconds(nanoseconds):
+    return nanoseconds / 1e9 if nanoseconds is not None else None
@@ -0,0 +1,247 @@
+import re
+import json
+import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Matches that are sensitive on their own; these never reach the LLM.
+CONFIDENT_PATTERNS = {
+    "IP_ADDRESS": r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b",
+    "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
+    "AWS_ACCESS_KEY": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+}
+
+# Cheap signals for spans that might be sensitive; the LLM decides. A pattern with a
+# capture group marks only that group as the candidate span.
+CANDIDATE_PATTERNS = {
+    "CREDENTIAL": r"(?i)\b(?:password|passwd|pwd|secret|token|api[_-]?key)\b\s*[:=]\s*['\"]?([^\s'\",;]+)",
+    "ACCOUNT_NUMBER": r"\b\d{6,}\b",
+    "SECRET": r"\b[A-Za-z0-9+/_-]{24,}={0,2}",
+    "PERSON": r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)+\b",
+}
+
+LABELS = ("IP_ADDRESS", "EMAIL", "CREDENTIAL", "ACCOUNT_NUMBER", "SECRET", "PERSON", "HOSTNAME", "NONE")
+
+PROMPT_TEMPLATE = """You classify spans of text for a data-sanitization tool.
+Each item shows a span between [[ and ]] with some surrounding context.
+Allowed labels: {labels}. Use NONE if the span is not sensitive.
+Reply with only a JSON array of objects like {{"id": 0, "label": "NONE"}}, one per item.
+
+{items}
+"""
+
+
+class Entity:
+    """A sensitive span found in the input text."""
+
+    def __init__(self, start: int, end: int, text: str, label: str, source: str):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.label = label
+        self.source = source  # "regex", "llm", "cache" or "fallback"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"start": self.start, "end": self.end, "text": self.text, "label": self.label, "source": self.source}
+
+    def __repr__(self):
+        return f"Entity({self.label!r}, {self.text!r}, {self.start}-{self.end}, {self.source})"
+
+
+class EntityCascade:
+    """
+    Regex-prefiltered entity recognition with the LLM as a second stage.
+
+    A compiled regex prefilter finds candidate spans. Confident hits (IP addresses,
+    emails, ...) are accepted as-is. Only the uncertain candidates, each with
+    ``context_chars`` of surrounding text, are packed ``batch_size`` at a time into
+    classification prompts for ``OllamaManager``. Verdicts are cached per
+    (span text, candidate label), so repeated values never reach the LLM twice.
+
+    Args:
+    ollama_manager (OllamaManager): Client used for the classification prompts
+    confident_patterns (Dict[str, str]): Label -> regex for spans accepted without the LLM
+    candidate_patterns (Dict[str, str]): Label -> regex for spans the LLM should classify
+    context_chars (int): Characters of context on each side of a candidate
+    batch_size (int): Candidates per LLM prompt
+    cache_size (int): Maximum number of cached verdicts
+    """
+
+    def __init__(self, ollama_manager, confident_patterns: Optional[Dict[str, str]] = None,
+                 candidate_patterns: Optional[Dict[str, str]] = None, context_chars: int = 40,
+                 batch_size: int = 16, cache_size: int = 10000):
+        self.ollama_manager = ollama_manager
+        self.confident = [(label, re.compile(p)) for label, p in (confident_patterns or CONFIDENT_PATTERNS).items()]
+        self.candidates = [(label, re.compile(p)) for label, p in (candidate_patterns or CANDIDATE_PATTERNS).items()]
+        self.context_chars = context_chars
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def classify(self, text: str) -> Tuple[List[Entity], Dict[str, Any]]:
+        """
+        Find sensitive entities in ``text``.
+
+        Returns (entities sorted by position, stats). ``stats["llm_fraction"]`` is the
+        share of input characters that was sent to the LLM; ``stats["llm_chars"]``
+        counts characters sent including overlapping context windows.
+        """
+        confident, candidates = self._prefilter(text)
+        entities = [Entity(start, end, text[start:end], label, "regex") for start, end, label in confident]
+
+        stats = {
+            "chars": len(text),
+            "regex_entities": len(confident),
+            "candidates": len(candidates),
+            "cache_hits": 0,
+            "llm_spans": 0,
+            "llm_calls": 0,
+            "llm_chars": 0,
+        }
+
+        pending: "OrderedDict[Tuple[str, str], List[Tuple[int, int]]]" = OrderedDict()
+        for start, end, hint in candidates:
+            key = (text[start:end], hint)
+            verdict = self._cache_get(key)
+            if verdict is not None:
+                stats["cache_hits"] += 1
+                if verdict != "NONE":
+                    entities.append(Entity(start, end, key[0], verdict, "cache"))
+            else:
+                pending.setdefault(key, []).append((start, end))
+
+        windows: List[Tuple[int, int]] = []
+        keys = list(pending)
+        for i in range(0, len(keys), self.batch_size):
+            batch = keys[i:i + self.batch_size]
+            verdicts = self._classify_batch(text, [(key, pending[key][0]) for key in batch], stats, windows)
+            for key in batch:
+                verdict, source = verdicts.get(key, (key[1], "fallback"))
+                if verdict != "NONE":
+                    entities.extend(Entity(start, end, key[0], verdict, source) for start, end in pending[key])
+
+        stats["llm_fraction"] = _covered(windows) / len(text) if text else 0.0
+        metrics.increment("entity_cascade_chars", stats["chars"])
+        metrics.increment("entity_cascade_llm_chars", stats["llm_chars"])
+        metrics.increment("entity_cascade_cache_hits", stats["cache_hits"])
+
+        entities.sort(key=lambda entity: entity.start)
+        return entities, stats
+
+    def _prefilter(self, text: str) -> Tuple[List[Tuple[int, int, str]], List[Tuple[int, int, str]]]:
+        """Return non-overlapping (start, end, label) spans: confident hits first, then candidates."""
+        taken_starts: List[int] = []
+        taken_ends: List[int] = []
+
+        def claim(start, end):
+            i = bisect_right(taken_starts, start)
+            if (i and taken_ends[i - 1] > start) or (i < len(taken_starts) and taken_starts[i] < end):
+                return False
+            taken_starts.insert(i, start)
+            taken_ends.insert(i, end)
+            return True
+
+        def scan(patterns):
+            found = []
+            for label, pattern in patterns:
+                for match in pattern.finditer(text):
+                    group = 1 if pattern.groups else 0
+                    start, end = match.span(group)
+                    if start < end and claim(start, end):
+                        found.append((start, end, label))
+            return found
+
+        return scan(self.confident), scan(self.candidates)
+
+    def _classify_batch(self, text: str, batch, stats, windows) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        items = []
+        for index, (key, (start, end)) in enumerate(batch):
+            window_start = max(0, start - self.context_chars)
+            window_end = min(len(text), end + self.context_chars)
+            before, after = text[window_start:start], text[end:window_end]
+            snippet = f"{before}[[{text[start:end]}]]{after}".replace("\n", " ")
+            stats["llm_chars"] += window_end - window_start
+            windows.append((window_start, window_end))
+            items.append(f"{index}. (looks like {key[1]}) {snippet}")
+
+        prompt = PROMPT_TEMPLATE.format(labels=", ".join(LABELS), items="\n".join(items))
+        stats["llm_calls"] += 1
+        stats["llm_spans"] += len(batch)
+
+        with metrics.span("entity_llm_batch"):
+            response = self.ollama_manager.generate_response(prompt)
+
+        labels = _parse_verdicts(response, len(batch))
+        if labels is None:
+            logger.warning("Could not parse LLM entity verdicts; keeping candidate labels")
+            return {}
+
+        verdicts = {}
+        for index, (key, _) in enumerate(batch):
+            label = labels.get(index)
+            if label is None:
+                continue
+            self._cache_put(key, label)
+            verdicts[key] = (label, "llm")
+        return verdicts
+
+    def _cache_get(self, key):
+        verdict = self._cache.get(key)
+        if verdict is not None:
+            self._cache.move_to_end(key)
+        return verdict
+
+    def _cache_put(self, key, verdict):
+        self._cache[key] = verdict
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+
+def _parse_verdicts(response: Optional[str], count: int) -> Optional[Dict[int, str]]:
+    """Extract ``{id: label}`` from the model's JSON reply; None if it is unusable."""
+    if not response:
+        return None
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    verdicts = {}
+    for item in parsed if isinstance(parsed, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        label = str(item.get("label", "")).upper()
+        if 0 <= index < count and label in LABELS:
+            verdicts[index] = label
+    return verdicts
+
+
+def _covered(windows: List[Tuple[int, int]]) -> int:
+    """Number of characters covered by the union of (start, end) windows."""
+    covered = 0
+    current_start = current_end = -1
+    for start, end in sorted(windows):
+        if start > current_end:
+            covered += current_end - current_start if current_end > current_start else 0
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end > current_start:
+        covered += current_end - current_start
+    return covered
@@ -0,0 +1,312 @@
+import os
+import time
+import json
+import logging
+import threading
+import statistics
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _NoopSpan:
+    """Shared do-nothing span returned while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: LabelKey):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, self.labels, error=exc_type is not None)
+        return False
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, value: float, error: bool = False) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if error:
+            self.errors += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "errors": self.errors,
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): total
+                        for bound, total in self.cumulative()},
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and span latency histograms.
+
+    When ``enabled`` is False, ``span`` returns a shared no-op context manager and
+    ``increment`` returns immediately, so instrumented code pays only an attribute check.
+
+    Args:
+    enabled (bool): Whether to record anything
+    namespace (str): Prefix used for exported Prometheus metric names
+    buckets (Sequence[float]): Histogram bucket upper bounds in seconds
+    """
+
+    def __init__(self, enabled: bool = False, namespace: str = "pandoraslock",
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def span(self, name: str, **labels):
+        """Time the enclosed block and record it under span ``name``."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def timed(self, name: str, **labels):
+        """Decorator form of ``span``."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, seconds: float, labels: LabelKey = (), error: bool = False) -> None:
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all counters and span histograms as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                "spans": [dict({"name": name, "labels": dict(labels)}, **histogram.to_dict())
+                          for (name, labels), histogram in sorted(self._histograms.items())],
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {ns}_{name}_total counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{ns}_{name}_total{_format_labels(labels)} {value}")
+
+            if self._histograms:
+                family = f"{ns}_span_duration_seconds"
+                lines.append(f"# TYPE {family} histogram")
+                for (name, labels), histogram in sorted(self._histograms.items()):
+                    span_labels = (("span", name),) + labels
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{family}_bucket{_format_labels(span_labels + (('le', le),))} {total}")
+                    lines.append(f"{family}_sum{_format_labels(span_labels)} {histogram.sum}")
+                    lines.append(f"{family}_count{_format_labels(span_labels)} {histogram.count}")
+
+                errors = f"{ns}_span_errors_total"
+                lines.append(f"# TYPE {errors} counter")
+                for (name, labels), histogram in sorted(self._histograms.items()):
+                    lines.append(f"{errors}{_format_labels((('span', name),) + labels)} {histogram.errors}")
+        return "\n".join(lines) + "\n"
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarise latency samples (seconds) as mean/min/max and p50/p90/p99."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        index = q * (len(ordered) - 1)
+        lower = int(index)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.mean(ordered),
+        "min": ordered[0],
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes", "on")
+
+
+# Process-wide registry used by the instrumented modules. Enable with PANDORAS_METRICS=1
+# or metrics.enable().
+metrics = MetricsRegistry(enabled=_env_flag("PANDORAS_METRICS"))
+
+
+def export_metrics(path: Optional[str] = None, registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Write the registry out at the end of a script run; does nothing while it is disabled.
+
+    Writes to ``path`` or PANDORAS_METRICS_FILE: Prometheus text for a ``.prom`` file,
+    JSON otherwise. With neither set, the JSON snapshot is logged at INFO.
+
+    Args:
+    path (str): Output file; overrides PANDORAS_METRICS_FILE
+    registry (MetricsRegistry): Registry to export, the process-wide ``metrics`` by default
+    """
+    registry = registry or metrics
+    if not registry.enabled:
+        return
+    path = path or os.getenv("PANDORAS_METRICS_FILE")
+    if not path:
+        logger.info(f"Metrics: {registry.to_json()}")
+        return
+    with open(path, "w") as f:
+        f.write(registry.to_prometheus() if path.endswith(".prom") else registry.to_json(indent=2))
+    logger.info(f"Wrote metrics to {path}")
+
+
+@contextmanager
+def profile_run(output_dir: str, cpu: bool = True, memory: bool = True, top: int = 25):
+    """
+    Profile the enclosed block with cProfile and/or tracemalloc.
+
+    Writes ``profile.prof`` (loadable with pstats/snakeviz) and ``memory_top.txt``
+    (top allocation sites) into ``output_dir``.
+
+    Args:
+    output_dir (str): Directory for the profile artifacts; created if missing
+    cpu (bool): Enable cProfile
+    memory (bool): Enable tracemalloc
+    top (int): Number of allocation sites to record
+    """
+    import cProfile
+    import tracemalloc
+
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = cProfile.Profile() if cpu else None
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profile_path = os.path.join(output_dir, "profile.prof")
+            profiler.dump_stats(profile_path)
+            logger.info(f"Wrote CPU profile to {profile_path}")
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            memory_path = os.path.join(output_dir, "memory_top.txt")
+            with open(memory_path, "w") as f:
+                f.write(f"peak_bytes {peak}\n")
+                for stat in snapshot.statistics("lineno")[:top]:
+                    f.write(f"{stat}\n")
+            logger.info(f"Wrote memory profile to {memory_path}")
+
+
+@contextmanager
+def maybe_profile_run(output_dir: Optional[str] = None):
+    """
+    Run ``profile_run`` only when requested for this run.
+
+    Enabled by passing ``output_dir`` or by setting PANDORAS_PROFILE_DIR.
+    """
+    output_dir = output_dir or os.getenv("PANDORAS_PROFILE_DIR")
+    if not output_dir:
+        yield
+        return
+    with profile_run(output_dir):
+        yield
@@ -2,6 +2,7 @@ import requests
 import json
 import time
 import logging
+from .metrics import metrics
 
 class OllamaManager:
     def __init__(self, host, port, model):
@@ -12,7 +13,8 @@ class OllamaManager:
     def is_service_ready(self, max_retries=5, delay=2):
         for _ in range(max_retries):
             try:
-                response = requests.get(f"{self.base_url}/api/tags")
+                with metrics.span("http_request", endpoint="/api/tags"):
+                    response = requests.get(f"{self.base_url}/api/tags")
                 if response.status_code == 200:
                     return True
             except requests.RequestException:
@@ -22,7 +24,8 @@ class OllamaManager:
 
     def pull_model(self):
         try:
-            response = requests.post(f"{self.base_url}/api/pull", json={"name": self.model})
+            with metrics.span("http_request", endpoint="/api/pull"):
+                response = requests.post(f"{self.base_url}/api/pull", json={"name": self.model})
             response.raise_for_status()
             self.logger.info(f"Successfully pulled model: {self.model}")
         except requests.RequestException as e:
@@ -30,54 +33,84 @@ class OllamaManager:
 
     def generate_response(self, prompt):
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt},
-                stream=True
-            )
-            response.raise_for_status()
-            
-            full_response = ""
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        chunk = json.loads(line)
-                        if 'response' in chunk:
-                            full_response += chunk['response']
-                        if chunk.get('done', False):
-                            break
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Failed to decode JSON: {line}")
-            
-            return full_response.strip()
+            response, _ = self._stream("/api/generate", {"model": self.model, "prompt": prompt})
+            return response
         except requests.RequestException as e:
             self.logger.error(f"Failed to generate response: {e}")
             return None
 
     def generate_response_with_details(self, prompt):
+        chunks = []
+        try:
+            response, _ = self._stream("/api/generate", {"model": self.model, "prompt": prompt}, chunks)
+            return response, chunks
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to generate response: {e}")
+            return None, []
+
+    def generate_with_context(self, prompt, context=None, system=None):
+        """
+        Generate a response, continuing from a previous ``context`` token array.
+
+        Returns (response_text, final_chunk). The final chunk carries the updated
+        ``context`` to pass to the next call, plus Ollama's eval counters.
+        """
+        payload = {"model": self.model, "prompt": prompt}
+        if context:
+            payload["context"] = context
+        if system:
+            payload["system"] = system
+        try:
+            return self._stream("/api/generate", payload)
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to generate response: {e}")
+            return None, {}
+
+    def chat(self, messages):
+        """
+        Send a list of ``{"role", "content"}`` messages to ``/api/chat``.
+
+        Returns (response_text, final_chunk).
+        """
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt},
-                stream=True
-            )
+            return self._stream("/api/chat", {"model": self.model, "messages": messages})
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to get chat response: {e}")
+            return None, {}
+
+    def _stream(self, endpoint, payload, chunks=None):
+        """
+        POST ``payload`` to a streaming endpoint and collect the reply.
+
+        Returns (response_text, final_chunk). Every decoded chunk is also appended to
+        ``chunks`` when a list is given.
+        """
+        with metrics.span("http_request", endpoint=endpoint):
+            response = requests.post(f"{self.base_url}{endpoint}", json=payload, stream=True)
             response.raise_for_status()
-            
+
             full_response = ""
-            chunks = []
+            final_chunk = {}
             for line in response.iter_lines():
                 if line:
                     try:
                         chunk = json.loads(line)
-                        chunks.append(chunk)
+                        if chunks is not None:
+                            chunks.append(chunk)
                         if 'response' in chunk:
                             full_response += chunk['response']
+                        elif 'message' in chunk:
+                            full_response += chunk['message'].get('content', '')
                         if chunk.get('done', False):
+                            final_chunk = chunk
+                            self._record_generation(chunk)
                             break
                     except json.JSONDecodeError:
                         self.logger.warning(f"Failed to decode JSON: {line}")
-            
-            return full_response.strip(), chunks
-        except requests.RequestException as e:
-            self.logger.error(f"Failed to generate response: {e}")
-            return None, []
\ No newline at end of file
+
+        return full_response.strip(), final_chunk
+
+    def _record_generation(self, final_chunk):
+        metrics.increment("ollama_requests", model=self.model)
+        metrics.increment("ollama_prompt_tokens", final_chunk.get("prompt_eval_count", 0), model=self.model)
+        metrics.increment("ollama_eval_tokens", final_chunk.get("eval_count", 0), model=self.model)
@@ -0,0 +1,293 @@
+import re
+import socket
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Bolt handshake: magic preamble followed by four proposed protocol versions
+# (5.0, 4.4, 4.3, 3.0). The server answers with the agreed version, or zeros.
+BOLT_MAGIC = b"\x60\x60\xb0\x17"
+BOLT_VERSIONS = b"\x00\x00\x00\x05" b"\x00\x00\x04\x04" b"\x00\x00\x03\x04" b"\x00\x00\x00\x03"
+
+# libpq treats any connect_timeout below 2 seconds as 2 seconds.
+LIBPQ_MIN_CONNECT_TIMEOUT = 2
+
+
+class ServiceProbe:
+    """
+    Base class for a single readiness check.
+
+    Subclasses implement ``check`` and return True once the service accepts work.
+    Returning False or raising an exception both count as "not ready yet". ``check``
+    must finish within ``attempt_timeout(timeout)`` seconds, where ``timeout`` is the
+    time the orchestrator has left before its deadline.
+    """
+
+    def __init__(self, name: str, timeout: float = 2.0):
+        self.name = name
+        self.timeout = timeout
+
+    def attempt_timeout(self, timeout: Optional[float] = None) -> float:
+        """The probe's own timeout, shortened to ``timeout`` when that is smaller."""
+        return self.timeout if timeout is None else min(self.timeout, timeout)
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+
+class FunctionProbe(ServiceProbe):
+    """
+    Wrap any zero-argument callable as a probe.
+
+    The callable cannot be interrupted, so it must bound its own run time.
+    """
+
+    def __init__(self, name: str, func: Callable[[], bool], timeout: float = 2.0):
+        super().__init__(name, timeout)
+        self.func = func
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        return bool(self.func())
+
+
+class TcpProbe(ServiceProbe):
+    """Ready once a TCP connection to host:port can be opened."""
+
+    def __init__(self, name: str, host: str, port: int, timeout: float = 2.0):
+        super().__init__(name, timeout)
+        self.host = host
+        self.port = int(port)
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        with socket.create_connection((self.host, self.port), timeout=self.attempt_timeout(timeout)):
+            return True
+
+
+class BoltProbe(TcpProbe):
+    """Ready once the Neo4j bolt port completes a protocol version handshake."""
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        # Socket timeouts apply to each operation, so shrink them to what is left.
+        deadline = time.monotonic() + self.attempt_timeout(timeout)
+        with socket.create_connection((self.host, self.port), timeout=self.attempt_timeout(timeout)) as sock:
+            sock.settimeout(_remaining(deadline))
+            sock.sendall(BOLT_MAGIC + BOLT_VERSIONS)
+            sock.settimeout(_remaining(deadline))
+            agreed = sock.recv(4)
+        return len(agreed) == 4 and agreed != b"\x00\x00\x00\x00"
+
+
+class HttpProbe(ServiceProbe):
+    """Ready once a GET request to ``url`` returns HTTP 200."""
+
+    def __init__(self, name: str, url: str, timeout: float = 2.0):
+        super().__init__(name, timeout)
+        self.url = url
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        # requests applies the timeout to connect and to the read separately; split it.
+        half = self.attempt_timeout(timeout) / 2
+        response = requests.get(self.url, timeout=(half, half))
+        return response.status_code == 200
+
+
+class PostgresProbe(ServiceProbe):
+    """
+    Ready once PostgreSQL accepts an authenticated connection.
+
+    Falls back to a plain TCP check when psycopg2 is not installed. libpq rounds
+    ``connect_timeout`` up to 2 seconds, so with less time left than that the attempt
+    fails instead of overrunning the deadline.
+    """
+
+    def __init__(self, name: str, connection_params: Dict[str, Any], timeout: float = 2.0):
+        super().__init__(name, timeout)
+        self.connection_params = connection_params
+
+    def check(self, timeout: Optional[float] = None) -> bool:
+        timeout = self.attempt_timeout(timeout)
+        try:
+            import psycopg2
+        except ImportError:
+            logger.debug("psycopg2 not installed, falling back to TCP check for PostgreSQL")
+            return TcpProbe(self.name, self.connection_params["host"],
+                            self.connection_params["port"], timeout).check()
+
+        if timeout < LIBPQ_MIN_CONNECT_TIMEOUT:
+            raise TimeoutError(f"{timeout:.2f}s left is below libpq's minimum connect_timeout")
+        conn = psycopg2.connect(connect_timeout=int(timeout), **self.connection_params)
+        conn.close()
+        return True
+
+
+class ServiceStatus:
+    """Outcome of waiting on a single probe."""
+
+    def __init__(self, name: str, ready: bool, attempts: int,
+                 time_to_ready: Optional[float], last_error: Optional[str] = None):
+        self.name = name
+        self.ready = ready
+        self.attempts = attempts
+        self.time_to_ready = time_to_ready
+        self.last_error = last_error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "time_to_ready": self.time_to_ready,
+            "last_error": self.last_error,
+        }
+
+    def __repr__(self):
+        return f"ServiceStatus({self.to_dict()!r})"
+
+
+class ReadinessReport:
+    """Per-service results of a ``ServiceReadinessOrchestrator.wait_until_ready`` call."""
+
+    def __init__(self, statuses: List[ServiceStatus], elapsed: float):
+        self.statuses = {status.name: status for status in statuses}
+        self.elapsed = elapsed
+
+    @property
+    def all_ready(self) -> bool:
+        return all(status.ready for status in self.statuses.values())
+
+    @property
+    def not_ready(self) -> List[str]:
+        return [name for name, status in self.statuses.items() if not status.ready]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "all_ready": self.all_ready,
+            "elapsed": self.elapsed,
+            "services": {name: status.to_dict() for name, status in self.statuses.items()},
+        }
+
+    def __bool__(self):
+        return self.all_ready
+
+
+class ServiceReadinessOrchestrator:
+    """
+    Probe several services concurrently until all are ready or a deadline passes.
+
+    Each probe is retried with exponential backoff (``initial_delay`` multiplied by
+    ``backoff_factor`` after every failure, capped at ``max_delay``). Neither sleeps
+    nor probe attempts overrun the shared ``timeout`` deadline: each attempt gets at
+    most the time that is left. The call returns as soon as the slowest service is
+    up, or at the deadline at the latest.
+
+    Args:
+    probes (Iterable[ServiceProbe]): Probes to run; any object with ``name`` and ``check()`` works,
+        but only ServiceProbe subclasses are told how much time is left
+    timeout (float): Total deadline in seconds for all services
+    initial_delay (float): Delay before the first retry of a failed probe
+    max_delay (float): Upper bound for the backoff delay
+    backoff_factor (float): Multiplier applied to the delay after each failure
+    """
+
+    def __init__(self, probes: Iterable[ServiceProbe], timeout: float = 120.0,
+                 initial_delay: float = 0.25, max_delay: float = 5.0, backoff_factor: float = 2.0):
+        self.probes = list(probes)
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "ServiceReadinessOrchestrator":
+        """Build probes for PostgreSQL, Neo4j bolt and every Ollama endpoint found in ``config``."""
+        probes: List[ServiceProbe] = []
+
+        if config.POSTGRES_HOST and config.POSTGRES_PORT:
+            probes.append(PostgresProbe("postgres", config.get_postgres_connection_params()))
+
+        if config.NEO4J_HOST and config.NEO4J_BOLT_PORT:
+            probes.append(BoltProbe("neo4j", config.NEO4J_HOST, config.NEO4J_BOLT_PORT))
+
+        for name, url in ollama_endpoints(config).items():
+            probes.append(HttpProbe(name, f"{url}/api/tags"))
+
+        return cls(probes, **kwargs)
+
+    def wait_until_ready(self) -> ReadinessReport:
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        if not self.probes:
+            return ReadinessReport([], 0.0)
+
+        with ThreadPoolExecutor(max_workers=len(self.probes)) as executor:
+            futures = [executor.submit(self._wait_for, probe, start, deadline) for probe in self.probes]
+            statuses = [future.result() for future in futures]
+
+        report = ReadinessReport(statuses, time.monotonic() - start)
+        if report.all_ready:
+            logger.info(f"All services ready in {report.elapsed:.2f}s")
+        else:
+            logger.error(f"Services not ready after {report.elapsed:.2f}s: {', '.join(report.not_ready)}")
+        return report
+
+    def _wait_for(self, probe: ServiceProbe, start: float, deadline: float) -> ServiceStatus:
+        delay = self.initial_delay
+        attempts = 0
+        last_error = None
+
+        while True:
+            attempts += 1
+            try:
+                if self._check(probe, deadline):
+                    time_to_ready = time.monotonic() - start
+                    logger.info(f"{probe.name} ready after {time_to_ready:.2f}s ({attempts} attempts)")
+                    return ServiceStatus(probe.name, True, attempts, time_to_ready)
+                last_error = "probe returned False"
+            except Exception as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"{probe.name} not ready before deadline: {last_error}")
+                return ServiceStatus(probe.name, False, attempts, None, last_error)
+
+            logger.debug(f"{probe.name} not ready (attempt {attempts}): {last_error}")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * self.backoff_factor, self.max_delay)
+
+
+    @staticmethod
+    def _check(probe, deadline: float) -> bool:
+        if isinstance(probe, ServiceProbe):
+            return probe.check(timeout=_remaining(deadline))
+        return probe.check()
+
+
+def _remaining(deadline: float) -> float:
+    # Never zero: a zero socket timeout means non-blocking, not "expired".
+    return max(deadline - time.monotonic(), 0.001)
+
+
+def ollama_endpoints(config) -> Dict[str, str]:
+    """
+    Collect base URLs for every Ollama service configured as ``OLLAMA_<NAME>_PORT``.
+
+    The matching ``OLLAMA_<NAME>_HOST`` is used when set; bind-all addresses such as
+    0.0.0.0 are probed through localhost.
+    """
+    endpoints = {}
+    for attr, port in sorted(vars(config).items()):
+        match = re.fullmatch(r"OLLAMA_(\w+)_PORT", attr)
+        if not match or not port:
+            continue
+        host = getattr(config, f"OLLAMA_{match.group(1)}_HOST", None)
+        if not host or host in ("0.0.0.0", "::"):
+            host = "localhost"
+        endpoints[f"ollama_{match.group(1).lower()}"] = f"http://{host}:{port}"
+    return endpoints